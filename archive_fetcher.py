@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""基于分支归档包的README获取
+
+一次性顺序下载分支的 tar.gz 归档，替代大量零散的 raw 请求：
+1. 流式下载归档到临时文件
+2. 只顺序解压一遍：保留README候选文件，图片文件暂存到临时目录，其余成员直接跳过
+3. 按优先级选出README，解析其中的相对图片链接
+4. 被引用的图片放入图片存储，返回 原链接 -> 本地路径 的映射
+
+相关环境变量：
+    ARCHIVE_MAX_BYTES   归档大小上限（字节），超出时放弃归档模式，默认 200MB
+"""
+
+import os
+import re
+import shutil
+import posixpath
+import tarfile
+import tempfile
+import github_api
+import http_client
+import image_store
+import image_filter
+import image_probe
+
+
+def _download_archive(url, dest_file, max_bytes):
+    """流式下载归档，超过大小上限时返回 False"""
+    connect_timeout, read_timeout = http_client.get_timeout()
+    with http_client.get(url, stream=True, timeout=(connect_timeout, max(read_timeout, 120))) as response:
+        if response.status_code != 200:
+            raise Exception(f"下载归档失败: HTTP {response.status_code}")
+        declared = int(response.headers.get('Content-Length') or 0)
+        if declared > max_bytes:
+            print(f"归档过大（{declared} 字节），放弃归档模式")
+            return False
+        size = 0
+        for chunk in response.iter_content(chunk_size=256 * 1024):
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > max_bytes:
+                print(f"归档超过大小上限 {max_bytes} 字节，放弃归档模式")
+                return False
+            dest_file.write(chunk)
+    dest_file.flush()
+    return True
+
+
+def _strip_root(name):
+    """去掉归档中的顶层目录（如 repo-main/）"""
+    parts = name.split('/', 1)
+    return parts[1] if len(parts) > 1 else ''
+
+
+def fetch_from_archive(url, branch=None, max_bytes=None):
+    """从分支归档中获取README和其引用的本地图片
+
+    Args:
+        url (str): GitHub仓库地址
+        branch (str): 分支名，默认使用仓库默认分支
+        max_bytes (int): 归档大小上限，默认读取 ARCHIVE_MAX_BYTES
+
+    Returns:
+        dict: {'content', 'branch', 'path', 'images'}，images 为 原图片链接 -> 本地路径；
+              归档不可用或未找到README时返回 None
+    """
+    repo = github_api.parse_repo_url(url)
+    if not repo:
+        return None
+    if max_bytes is None:
+        max_bytes = int(os.getenv('ARCHIVE_MAX_BYTES', str(200 * 1024 * 1024)))
+
+    if not branch:
+        location = github_api.get_readme_location(url) or {}
+        branch = location.get('branch') or github_api.get_repo_info(url).get('default_branch') or 'HEAD'
+
+    archive_url = f"https://codeload.github.com/{repo}/tar.gz/{branch}"
+    raw_base = f"https://raw.githubusercontent.com/{repo}/{branch}"
+    print(f"下载仓库归档：{archive_url}")
+
+    readme_names = set(github_api.README_FILENAMES)
+    max_image_bytes = image_probe.get_max_bytes()
+    with tempfile.TemporaryFile() as archive_file, tempfile.TemporaryDirectory() as image_dir:
+        if not _download_archive(archive_url, archive_file, max_bytes):
+            return None
+        archive_file.seek(0)
+
+        # 流式模式只能向前读：一遍扫描中保留README候选，暂存可能被引用的图片
+        readmes = {}
+        staged = {}
+        with tarfile.open(fileobj=archive_file, mode='r|gz') as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                path = _strip_root(member.name)
+                if path in readme_names:
+                    readmes[path] = tar.extractfile(member).read().decode('utf-8', errors='replace')
+                elif (os.path.splitext(path)[1].lower() in image_store.IMAGE_EXTENSIONS
+                      and member.size <= max_image_bytes
+                      and not image_filter.get_image_filter().should_skip(path)):
+                    staged_path = os.path.join(image_dir, str(len(staged)))
+                    with open(staged_path, 'wb') as f:
+                        shutil.copyfileobj(tar.extractfile(member), f, 256 * 1024)
+                    staged[path] = staged_path
+
+        readme_path = next((name for name in github_api.README_FILENAMES if name in readmes), None)
+        if not readme_path:
+            print(f"归档中未找到README文件：{url}")
+            return None
+        content = readmes[readme_path]
+        print(f"成功从归档中找到文件：{readme_path}")
+
+        # 收集README引用的、归档中存在的相对图片
+        readme_dir = posixpath.dirname(readme_path)
+        wanted = {}
+        for _, img_url in re.findall(r'!\[([^\]]*)\]\(([^)]+)\)', content):
+            path = github_api.resolve_repo_path(readme_dir, img_url)
+            if path and path in staged:
+                wanted.setdefault(path, []).append(img_url)
+
+        store = image_store.get_image_store()
+        images = {}
+        for path, img_urls in wanted.items():
+            tmp_path = store.temp_path()
+            try:
+                shutil.copyfile(staged[path], tmp_path)
+                local_path = store.put_file(f"{raw_base}/{path}", tmp_path)
+                for img_url in img_urls:
+                    images[img_url] = local_path
+            except Exception as e:
+                print(f"从归档中提取图片失败 {path}: {str(e)}")
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    return {
+        'content': content,
+        'branch': branch,
+        'path': readme_path,
+        'images': images
+    }
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""结构化文章
+
+JSON 输出模式下，大模型直接返回包含标题、副标题、摘要和各章节的 JSON 对象，
+校验通过后直接作为模板上下文使用，不再逐行解析 Markdown。
+"""
+
+import re
+import json
+import text_normalizer
+
+# 文章元信息字段
+META_FIELDS = ('title', 'subtitle', 'digest')
+
+# 章节字段，顺序与模板一致
+SECTION_FIELDS = (
+    'preface', 'introduction', 'features', 'technical',
+    'installation', 'usage', 'repository', 'conclusion'
+)
+
+FIELDS = META_FIELDS + SECTION_FIELDS
+
+_CODE_FENCE = re.compile(r'^\s*```(?:json)?\s*\n(.*?)\n\s*```\s*$', re.DOTALL)
+
+
+def parse_article(text):
+    """解析结构化文章
+
+    Args:
+        text (str): 大模型输出（允许被 ```json 代码块包裹）
+
+    Returns:
+        dict: 文章对象；不是 JSON 对象时返回 None
+    """
+    if not text or not isinstance(text, str):
+        return None
+    stripped = text.strip()
+    match = _CODE_FENCE.match(stripped)
+    if match:
+        stripped = match.group(1).strip()
+    if not stripped.startswith('{'):
+        return None
+    try:
+        article = json.loads(stripped)
+    except ValueError:
+        return None
+    return article if isinstance(article, dict) else None
+
+
+def validate(article):
+    """校验文章对象
+
+    Returns:
+        list: 缺失、类型错误或内容为空的字段，全部有效时返回空列表
+    """
+    if not isinstance(article, dict):
+        return list(FIELDS)
+    return [field for field in FIELDS if not isinstance(article.get(field), str) or not article[field].strip()]
+
+
+def normalize(article):
+    """只保留约定字段，缺失的补为空字符串，并规范化文本"""
+    return {
+        field: text_normalizer.normalize_text(article.get(field) if isinstance(article.get(field), str) else '')
+        for field in FIELDS
+    }
+
+
+def dumps(article):
+    """序列化为保存和缓存使用的文本"""
+    return json.dumps(article, ensure_ascii=False, indent=2)
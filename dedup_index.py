@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""README近似重复检测
+
+对规范化后的README文本做分词切片（shingling），计算 MinHash 签名，
+再用 LSH 分桶索引（sqlite 持久化），在大模型分析之前找出 fork、镜像、模板生成的近似重复仓库。
+
+- 签名长度 128，分 16 个band、每个band 8 行，相似度约 0.7 以上的文档会落入同一个桶
+- 候选结果再用签名估算 Jaccard 相似度，不低于 DEDUP_THRESHOLD 才算重复
+- 查询只需一次带索引的 sqlite 查询，数万篇README时仍是亚毫秒级
+
+相关环境变量：
+    DEDUP_ENABLED     是否启用，默认 true
+    DEDUP_THRESHOLD   判定为重复的相似度阈值，默认 0.85
+    DEDUP_ACTION      发现重复时的处理：reuse（复用已有文章，默认）或 skip（跳过）
+    DEDUP_REPUBLISH   复用的文章已发布过时是否仍发布，默认 false
+    DEDUP_INDEX_FILE  索引文件路径，默认 CACHE_DIR/dedup_index.sqlite3
+"""
+
+import os
+import re
+import struct
+import sqlite3
+import hashlib
+import threading
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy 可选，仅用于加速签名计算
+    np = None
+
+_dedup_index = None
+_dedup_index_lock = threading.Lock()
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations(num_perm, seed=1):
+    """生成固定的哈希置换参数 (a, b)，保证签名在不同运行间一致"""
+    params = []
+    counter = 0
+    while len(params) < num_perm:
+        digest = hashlib.sha256(f'{seed}:{counter}'.encode('ascii')).digest()
+        a = int.from_bytes(digest[:8], 'big') % _MERSENNE_PRIME
+        b = int.from_bytes(digest[8:16], 'big') % _MERSENNE_PRIME
+        counter += 1
+        if a:
+            params.append((a, b))
+    return params
+
+
+_PERMUTATIONS = _permutations(NUM_PERM)
+
+
+def normalize_text(content):
+    """规范化README文本：去掉代码块、链接地址、图片、HTML标签和Markdown符号，统一大小写和空白"""
+    text = re.sub(r'```.*?```', ' ', content, flags=re.DOTALL)
+    text = re.sub(r'!\[[^\]]*\]\([^)]*\)', ' ', text)
+    text = re.sub(r'\[([^\]]*)\]\([^)]*\)', r'\1', text)
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = re.sub(r'https?://\S+', ' ', text)
+    return text.lower()
+
+
+def tokenize(text):
+    """分词：中日韩字符逐字切分，其他按单词切分"""
+    return re.findall(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]|[a-z0-9_]+', text)
+
+
+def shingles(content, size=SHINGLE_SIZE):
+    """生成词级切片的 32 位哈希集合"""
+    tokens = tokenize(normalize_text(content))
+    if len(tokens) < size:
+        grams = [' '.join(tokens)] if tokens else []
+    else:
+        grams = (' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+    return {
+        struct.unpack('<I', hashlib.blake2b(gram.encode('utf-8'), digest_size=4).digest())[0]
+        for gram in grams
+    }
+
+
+def minhash(content):
+    """计算 MinHash 签名
+
+    Returns:
+        array: 长度为 NUM_PERM 的无符号整数数组，文本为空时返回 None
+    """
+    values = shingles(content)
+    if not values:
+        return None
+    if np is not None:
+        return _minhash_numpy(values)
+    signature = array('I')
+    for a, b in _PERMUTATIONS:
+        signature.append(min(((a * v + b) % _MERSENNE_PRIME) & _MAX_HASH for v in values))
+    return signature
+
+
+def _minhash_numpy(values):
+    """numpy 版本的签名计算，结果与纯 Python 版本一致
+
+    a、b 拆成高低 32 位分别相乘，避免 61 位素数取模时溢出 64 位整数。
+    """
+    v = np.fromiter(values, dtype=np.uint64)
+    signature = array('I')
+    for a, b in _PERMUTATIONS:
+        a_hi, a_lo = np.uint64(a >> 32), np.uint64(a & 0xFFFFFFFF)
+        # (a * v) mod p = ((a_hi * v mod p) * 2^32 + a_lo * v) mod p
+        hi = (a_hi * v) % np.uint64(_MERSENNE_PRIME)
+        hi = _mulmod_2_32(hi)
+        lo = (a_lo * v) % np.uint64(_MERSENNE_PRIME)
+        hashed = (hi + lo + np.uint64(b % _MERSENNE_PRIME)) % np.uint64(_MERSENNE_PRIME)
+        signature.append(int((hashed & np.uint64(_MAX_HASH)).min()))
+    return signature
+
+
+def _mulmod_2_32(x):
+    """计算 (x * 2^32) mod p，p = 2^61 - 1（利用 2^61 ≡ 1 mod p）"""
+    p = np.uint64(_MERSENNE_PRIME)
+    # x < 2^61，x * 2^32 = x_hi * 2^61 + x_lo * 2^32，其中 x_hi = x >> 29
+    x_hi = x >> np.uint64(29)
+    x_lo = x & np.uint64((1 << 29) - 1)
+    return (x_hi + (x_lo << np.uint64(32))) % p
+
+
+def similarity(sig_a, sig_b):
+    """用签名估算 Jaccard 相似度"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def _band_keys(signature):
+    """把签名切分为 LSH 桶键"""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        bucket = int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'big', signed=True)
+        keys.append((band, bucket))
+    return keys
+
+
+class DedupIndex:
+    """持久化的 MinHash LSH 索引"""
+
+    def __init__(self, index_file=None, threshold=None):
+        """初始化索引
+
+        Args:
+            index_file (str): sqlite 文件路径，默认读取 DEDUP_INDEX_FILE
+            threshold (float): 相似度阈值，默认读取 DEDUP_THRESHOLD
+        """
+        self.index_file = index_file or os.getenv('DEDUP_INDEX_FILE') or os.path.join(os.getenv('CACHE_DIR', '.cache'), 'dedup_index.sqlite3')
+        self.threshold = threshold if threshold is not None else float(os.getenv('DEDUP_THRESHOLD', '0.85'))
+        os.makedirs(os.path.dirname(self.index_file) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.index_file, check_same_thread=False)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_key TEXT PRIMARY KEY,
+                signature BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                doc_key TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_buckets ON buckets (band, bucket);
+            CREATE INDEX IF NOT EXISTS idx_buckets_doc ON buckets (doc_key);
+        ''')
+        self._conn.commit()
+
+    def add(self, key, content):
+        """加入（或更新）一篇README"""
+        signature = minhash(content)
+        if signature is None:
+            return
+        with self._lock:
+            self._conn.execute('DELETE FROM buckets WHERE doc_key = ?', (key,))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO documents (doc_key, signature) VALUES (?, ?)',
+                (key, signature.tobytes())
+            )
+            self._conn.executemany(
+                'INSERT INTO buckets (band, bucket, doc_key) VALUES (?, ?, ?)',
+                [(band, bucket, key) for band, bucket in _band_keys(signature)]
+            )
+            self._conn.commit()
+
+    def find_duplicate(self, content, exclude_key=None):
+        """查找最相似的已索引README
+
+        Args:
+            content (str): README内容
+            exclude_key (str): 排除的键（通常是当前文章自身）
+
+        Returns:
+            tuple: (键, 相似度)，没有达到阈值的结果时返回 (None, 0.0)
+        """
+        signature = minhash(content)
+        if signature is None:
+            return None, 0.0
+        band_keys = _band_keys(signature)
+        condition = ' OR '.join(['(b.band = ? AND b.bucket = ?)'] * len(band_keys))
+        params = [value for pair in band_keys for value in pair]
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT DISTINCT d.doc_key, d.signature FROM buckets b '
+                f'JOIN documents d ON d.doc_key = b.doc_key WHERE {condition}',
+                params
+            ).fetchall()
+
+        best_key, best_score = None, 0.0
+        for doc_key, blob in rows:
+            if doc_key == exclude_key:
+                continue
+            candidate = array('I')
+            candidate.frombytes(blob)
+            score = similarity(signature, candidate)
+            if score > best_score:
+                best_key, best_score = doc_key, score
+        if best_score >= self.threshold:
+            return best_key, best_score
+        return None, 0.0
+
+
+def get_dedup_index():
+    """获取全局近似重复索引"""
+    global _dedup_index
+    with _dedup_index_lock:
+        if _dedup_index is None:
+            _dedup_index = DedupIndex()
+        return _dedup_index
@@ -0,0 +1,484 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import threading
+import posixpath
+import http_client
+from urllib.parse import urlparse, parse_qs
+
+# README候选文件名（按优先级排列）
+README_FILENAMES = [
+    'README.md', 'README', 'readme.md', 'Readme.md',
+    'README_CN.md', 'README.zh-CN.md', 'README_zh.md',  # 添加中文README文件名
+    'docs/README.md', 'doc/README.md',  # 添加可能的文档目录
+    'docs/zh/README.md', 'docs/cn/README.md'  # 添加可能的中文文档目录
+]
+
+# 缓存单例
+_metadata_cache = None
+_metadata_cache_lock = threading.Lock()
+
+
+class RepoMetadataCache:
+    """仓库元数据磁盘缓存，按TTL过期"""
+
+    def __init__(self, cache_file=None, ttl=None):
+        """初始化缓存
+
+        Args:
+            cache_file (str): 缓存文件路径，默认 CACHE_DIR/repo_metadata.json
+            ttl (int): 过期时间（秒），默认读取 REPO_METADATA_CACHE_TTL
+        """
+        cache_dir = os.getenv('CACHE_DIR', '.cache')
+        self.cache_file = cache_file or os.path.join(cache_dir, 'repo_metadata.json')
+        self.ttl = ttl if ttl is not None else int(os.getenv('REPO_METADATA_CACHE_TTL', '86400'))
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self):
+        """从磁盘读取缓存"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        """写回磁盘（先写临时文件再替换，避免写坏缓存）"""
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+
+    def get(self, key, field):
+        """读取未过期的缓存字段，不存在或已过期时返回 None"""
+        with self._lock:
+            entry = self._data.get(key, {}).get(field)
+            if not entry or time.time() - entry.get('fetched_at', 0) > self.ttl:
+                return None
+            return entry.get('value')
+
+    def set(self, key, field, value):
+        """写入缓存字段"""
+        with self._lock:
+            self._data.setdefault(key, {})[field] = {
+                'value': value,
+                'fetched_at': time.time()
+            }
+            try:
+                self._save()
+            except OSError as e:
+                print(f"写入仓库元数据缓存失败: {str(e)}")
+
+
+def get_metadata_cache():
+    """获取全局仓库元数据缓存"""
+    global _metadata_cache
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            _metadata_cache = RepoMetadataCache()
+        return _metadata_cache
+
+
+class RateLimiter:
+    """GitHub API 限流调度器
+
+    根据响应头 X-RateLimit-Remaining / X-RateLimit-Reset 跟踪每类资源（core、graphql 等）的剩余配额：
+    - 剩余配额低于 GITHUB_RATE_LIMIT_PACE_BELOW 时，把剩余请求均匀分布到重置时间之前
+    - 配额耗尽时等待到重置时间再发送，而不是让请求失败
+    """
+
+    def __init__(self, pace_below=None, max_wait=None):
+        """初始化调度器
+
+        Args:
+            pace_below (int): 剩余配额低于该值时开始限速，默认读取 GITHUB_RATE_LIMIT_PACE_BELOW
+            max_wait (int): 单次最长等待秒数，超过则放弃请求，默认读取 GITHUB_RATE_LIMIT_MAX_WAIT
+        """
+        self.pace_below = pace_below if pace_below is not None else int(os.getenv('GITHUB_RATE_LIMIT_PACE_BELOW', '100'))
+        self.max_wait = max_wait if max_wait is not None else int(os.getenv('GITHUB_RATE_LIMIT_MAX_WAIT', '900'))
+        self._lock = threading.Lock()
+        # 资源名 -> {'remaining', 'reset', 'next_at'}
+        self._buckets = {}
+
+    def status(self, resource):
+        """返回资源的配额状态副本"""
+        with self._lock:
+            return dict(self._buckets.get(resource) or {})
+
+    def _schedule(self, bucket, now):
+        """计算 (需要等待的秒数, 与下一个请求的最小间隔)（调用方持有锁）"""
+        remaining = bucket.get('remaining')
+        reset = bucket.get('reset', 0)
+        if remaining is None or reset <= now:
+            return 0, 0
+        if remaining <= 0:
+            # 配额耗尽，等到重置时间（多等1秒避免时钟误差）
+            return reset - now + 1, 0
+        if remaining < self.pace_below:
+            # 把剩余请求均匀分布到重置前
+            return max(0, bucket.get('next_at', 0) - now), (reset - now) / remaining
+        return 0, 0
+
+    def acquire(self, resource):
+        """在发送请求前调用，必要时阻塞等待"""
+        with self._lock:
+            bucket = self._buckets.setdefault(resource, {})
+            now = time.time()
+            delay, interval = self._schedule(bucket, now)
+            if delay > self.max_wait:
+                raise Exception(
+                    f"GitHub API配额已用尽（{resource}），需等待 {int(delay)} 秒，超过上限 {self.max_wait} 秒"
+                )
+            # 预占配额，保证并发请求之间也按间隔排队
+            if bucket.get('remaining') is not None and bucket['remaining'] > 0:
+                bucket['remaining'] -= 1
+            bucket['next_at'] = now + delay + interval
+
+        if delay > 0:
+            print(f"GitHub API配额不足（{resource}），等待 {delay:.1f} 秒")
+            time.sleep(delay)
+
+    def update(self, resource, headers):
+        """根据响应头更新配额信息"""
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        resource = headers.get('X-RateLimit-Resource') or resource
+        with self._lock:
+            bucket = self._buckets.setdefault(resource, {})
+            try:
+                bucket['remaining'] = int(remaining)
+                bucket['reset'] = int(reset)
+            except ValueError:
+                pass
+
+    def block_until(self, resource, reset):
+        """把资源标记为耗尽直到指定时间（用于 403/429 响应）"""
+        with self._lock:
+            bucket = self._buckets.setdefault(resource, {})
+            bucket['remaining'] = 0
+            bucket['reset'] = max(bucket.get('reset', 0), reset)
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """获取全局限流调度器"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
+
+
+def get_github_token():
+    """读取 GitHub 访问令牌，未配置时返回 None"""
+    return os.getenv('GITHUB_TOKEN') or None
+
+
+def github_request(method, url, **kwargs):
+    """发送 GitHub API 请求：自动携带令牌，并按配额调度
+
+    遇到限流响应（403/429 且配额为0，或带 Retry-After）时等待后重试，
+    重试次数由 GITHUB_RATE_LIMIT_RETRIES 控制（默认 2）。
+
+    Returns:
+        requests.Response: 响应对象
+    """
+    resource = 'graphql' if url.rstrip('/').endswith('/graphql') else 'core'
+    headers = dict(kwargs.pop('headers', None) or {})
+    headers.setdefault('Accept', 'application/vnd.github+json')
+    token = get_github_token()
+    if token:
+        headers.setdefault('Authorization', f'Bearer {token}')
+
+    limiter = get_rate_limiter()
+    retries = int(os.getenv('GITHUB_RATE_LIMIT_RETRIES', '2'))
+    for attempt in range(retries + 1):
+        limiter.acquire(resource)
+        response = http_client.request(method, url, headers=headers, **kwargs)
+        limiter.update(resource, response.headers)
+
+        rate_limited = response.status_code in (403, 429) and (
+            response.headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in response.headers
+        )
+        if not rate_limited or attempt == retries:
+            return response
+
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            reset = time.time() + int(retry_after)
+        else:
+            reset = int(response.headers.get('X-RateLimit-Reset') or time.time() + 60)
+        limiter.block_until(response.headers.get('X-RateLimit-Resource') or resource, reset)
+    return response
+
+
+def github_get(url, **kwargs):
+    """发送 GitHub API GET 请求"""
+    return github_request('GET', url, **kwargs)
+
+
+def parse_repo_url(url):
+    """从GitHub地址中解析 owner/repo
+
+    Args:
+        url (str): GitHub仓库地址
+
+    Returns:
+        str: "owner/repo" 形式的仓库名，无法解析时返回 None
+    """
+    parts = [p for p in urlparse(url).path.split('/') if p]
+    if len(parts) < 2:
+        return None
+    repo = parts[1][:-4] if parts[1].endswith('.git') else parts[1]
+    return f"{parts[0]}/{repo}"
+
+
+def resolve_repo_path(readme_dir, img_url):
+    """把README中的相对图片链接解析为仓库内路径
+
+    Args:
+        readme_dir (str): README所在目录（仓库内路径）
+        img_url (str): README中的图片链接
+
+    Returns:
+        str: 仓库内路径，非相对链接或越出仓库时返回 None
+    """
+    if img_url.startswith(('http://', 'https://', 'data:', '//')):
+        return None
+    path = img_url.split('#')[0].split('?')[0].strip()
+    if not path:
+        return None
+    path = path.lstrip('/') if path.startswith('/') else posixpath.join(readme_dir, path)
+    path = posixpath.normpath(path)
+    return None if path.startswith('..') else path
+
+
+def get_readme_location(url, cache=None):
+    """通过一次 /readme 接口调用获取默认分支和README路径
+
+    Args:
+        url (str): GitHub仓库地址
+        cache (RepoMetadataCache): 元数据缓存，默认使用全局缓存
+
+    Returns:
+        dict: {'branch': 默认分支, 'path': README路径}，未找到时返回 None
+    """
+    repo = parse_repo_url(url)
+    if not repo:
+        return None
+    cache = cache or get_metadata_cache()
+
+    cached = cache.get(repo, 'readme')
+    if cached is not None:
+        return cached or None
+
+    location = {}
+    try:
+        response = github_get(f"https://api.github.com/repos/{repo}/readme")
+        if response.status_code == 200:
+            readme_info = response.json()
+            # 接口返回的 url 中带有 ?ref=<默认分支>
+            ref = parse_qs(urlparse(readme_info.get('url', '')).query).get('ref', [None])[0]
+            if not ref:
+                ref = get_repo_info(url, cache).get('default_branch')
+            if ref and readme_info.get('path'):
+                location = {'branch': ref, 'path': readme_info['path']}
+        elif response.status_code != 404:
+            # 非404错误（如限流）不写入缓存
+            print(f"获取README位置失败: HTTP {response.status_code}")
+            return None
+    except Exception as e:
+        print(f"获取README位置失败: {str(e)}")
+        return None
+
+    # 未找到时缓存空结果，避免在TTL内重复请求
+    cache.set(repo, 'readme', location)
+    return location or None
+
+
+def remember_readme_location(url, branch, path, cache=None):
+    """记录探测到的README位置，下次运行直接使用"""
+    repo = parse_repo_url(url)
+    if repo:
+        (cache or get_metadata_cache()).set(repo, 'readme', {'branch': branch, 'path': path})
+
+
+def get_repo_info(url, cache=None):
+    """获取仓库基本信息（带缓存）
+
+    Returns:
+        dict: 仓库信息，失败时返回空字典
+    """
+    repo = parse_repo_url(url)
+    if not repo:
+        return {}
+    cache = cache or get_metadata_cache()
+
+    cached = cache.get(repo, 'repo_info')
+    if cached is not None:
+        return cached
+
+    try:
+        response = github_get(f"https://api.github.com/repos/{repo}")
+        if response.status_code != 200:
+            print(f"获取仓库信息失败: HTTP {response.status_code}")
+            return {}
+        info = response.json()
+    except Exception as e:
+        print(f"获取仓库信息失败: {str(e)}")
+        return {}
+
+    # 只缓存用得到的字段
+    repo_info = {
+        'default_branch': info.get('default_branch'),
+        'full_name': info.get('full_name'),
+        'description': info.get('description')
+    }
+    cache.set(repo, 'repo_info', repo_info)
+    return repo_info
+
+
+def get_repo_branches(url, cache=None, max_pages=None):
+    """获取仓库所有分支名（分页，带缓存）
+
+    Args:
+        url (str): GitHub仓库地址
+        cache (RepoMetadataCache): 元数据缓存
+        max_pages (int): 最多请求的页数，默认读取 GITHUB_BRANCH_MAX_PAGES
+
+    Returns:
+        list: 分支名列表
+    """
+    repo = parse_repo_url(url)
+    if not repo:
+        return []
+    cache = cache or get_metadata_cache()
+
+    cached = cache.get(repo, 'branches')
+    if cached is not None:
+        return cached
+
+    if max_pages is None:
+        max_pages = int(os.getenv('GITHUB_BRANCH_MAX_PAGES', '5'))
+
+    branches = []
+    try:
+        for page in range(1, max_pages + 1):
+            response = github_get(
+                f"https://api.github.com/repos/{repo}/branches",
+                params={'per_page': 100, 'page': page}
+            )
+            if response.status_code != 200:
+                print(f"获取分支列表失败: HTTP {response.status_code}")
+                return branches
+            page_items = response.json()
+            if not isinstance(page_items, list):
+                return branches
+            branches.extend(b['name'] for b in page_items if 'name' in b)
+            if len(page_items) < 100:
+                break
+    except Exception as e:
+        print(f"获取分支列表失败: {str(e)}")
+        return branches
+
+    cache.set(repo, 'branches', branches)
+    return branches
+
+
+# GraphQL批量查询时尝试的README文件名
+GRAPHQL_README_FILENAMES = ['README.md', 'readme.md', 'Readme.md', 'README']
+
+
+def _build_batch_query(repos):
+    """构建批量查询语句，每个仓库使用 r<序号> 别名，每个文件名使用 f<序号> 别名"""
+    blob_fields = '... on Blob { text isTruncated isBinary }'
+    parts = []
+    for i, repo in enumerate(repos):
+        owner, name = repo.split('/')
+        files = '\n'.join(
+            f'f{j}: object(expression: {json.dumps("HEAD:" + filename)}) {{ {blob_fields} }}'
+            for j, filename in enumerate(GRAPHQL_README_FILENAMES)
+        )
+        parts.append(
+            f'r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{\n'
+            f'defaultBranchRef {{ name target {{ oid }} }}\n{files}\n}}'
+        )
+    return 'query {\n' + '\n'.join(parts) + '\n}'
+
+
+def fetch_readmes_batch(urls, batch_size=None):
+    """通过 GraphQL 批量获取多个仓库的默认分支、README内容和最新提交SHA
+
+    GraphQL 接口需要令牌，未配置 GITHUB_TOKEN 时直接返回空结果。
+    未命中的仓库不会出现在结果中，由调用方回退到逐个仓库获取。
+
+    Args:
+        urls (list): GitHub仓库地址列表
+        batch_size (int): 每次查询的仓库数，默认读取 GITHUB_GRAPHQL_BATCH_SIZE
+
+    Returns:
+        dict: 仓库地址 -> {'content', 'branch', 'path', 'sha'}
+    """
+    token = get_github_token()
+    if not token:
+        return {}
+    if batch_size is None:
+        batch_size = int(os.getenv('GITHUB_GRAPHQL_BATCH_SIZE', '20'))
+
+    # 同一仓库的多个地址只查询一次
+    repo_urls = {}
+    for url in urls:
+        repo = parse_repo_url(url)
+        if repo:
+            repo_urls.setdefault(repo, []).append(url)
+    repos = list(repo_urls)
+
+    results = {}
+    for start in range(0, len(repos), max(1, batch_size)):
+        batch = repos[start:start + batch_size]
+        try:
+            response = github_request(
+                'POST', 'https://api.github.com/graphql',
+                json={'query': _build_batch_query(batch)}
+            )
+            if response.status_code != 200:
+                print(f"GraphQL批量查询失败: HTTP {response.status_code}")
+                continue
+            data = response.json().get('data') or {}
+        except Exception as e:
+            print(f"GraphQL批量查询失败: {str(e)}")
+            continue
+
+        for i, repo in enumerate(batch):
+            repo_data = data.get(f'r{i}')
+            if not repo_data or not repo_data.get('defaultBranchRef'):
+                continue
+            branch_ref = repo_data['defaultBranchRef']
+            for j, filename in enumerate(GRAPHQL_README_FILENAMES):
+                blob = repo_data.get(f'f{j}')
+                if blob and blob.get('text') and not blob.get('isTruncated') and not blob.get('isBinary'):
+                    readme = {
+                        'content': blob['text'],
+                        'branch': branch_ref['name'],
+                        'path': filename,
+                        'sha': (branch_ref.get('target') or {}).get('oid')
+                    }
+                    remember_readme_location(repo_urls[repo][0], readme['branch'], filename)
+                    for url in repo_urls[repo]:
+                        results[url] = readme
+                    break
+
+        print(f"GraphQL批量获取README：{len(batch)} 个仓库，命中 {sum(1 for r in batch if repo_urls[r][0] in results)} 个")
+
+    return results
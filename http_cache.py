@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""基于 ETag / Last-Modified 的条件请求磁盘缓存
+
+响应体按URL的哈希保存在 CACHE_DIR/http 下，索引记录校验信息和最近使用时间。
+再次请求同一URL时带上 If-None-Match / If-Modified-Since，服务器返回304时直接读取磁盘内容。
+总大小超过上限时按最近最少使用（LRU）淘汰。
+
+相关环境变量：
+    HTTP_CACHE_ENABLED     是否启用，默认 true
+    HTTP_CACHE_MAX_BYTES   缓存总大小上限（字节），默认 200MB
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import http_client
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+class CachedResponse:
+    """缓存感知的响应对象，提供与 requests.Response 相近的常用属性"""
+
+    def __init__(self, status_code, content, headers=None, encoding=None, from_cache=False):
+        self.status_code = status_code
+        self.content = content or b''
+        self.headers = headers or {}
+        self.encoding = encoding
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        """按响应编码解码内容"""
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class HttpCache:
+    """条件请求磁盘缓存"""
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """初始化缓存
+
+        Args:
+            cache_dir (str): 缓存目录，默认 CACHE_DIR/http
+            max_bytes (int): 缓存总大小上限，默认读取 HTTP_CACHE_MAX_BYTES
+        """
+        self.cache_dir = cache_dir or os.path.join(os.getenv('CACHE_DIR', '.cache'), 'http')
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('HTTP_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+        self.index_file = os.path.join(self.cache_dir, 'index.json')
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        """读取索引"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        """写回索引"""
+        tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def _body_path(self, url):
+        """URL对应的响应体文件路径"""
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+    def _read_body(self, url):
+        """读取缓存的响应体，文件丢失时返回 None"""
+        try:
+            with open(self._body_path(url), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _remove(self, url):
+        """删除缓存条目（调用方持有锁）"""
+        self._index.pop(url, None)
+        try:
+            os.remove(self._body_path(url))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """按LRU淘汰，直到总大小不超过上限（调用方持有锁）"""
+        total = sum(entry.get('size', 0) for entry in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for url, entry in sorted(self._index.items(), key=lambda item: item[1].get('last_used', 0)):
+            if total <= self.max_bytes:
+                break
+            total -= entry.get('size', 0)
+            self._remove(url)
+
+    def _conditional_headers(self, entry, headers):
+        """在请求头中加入条件请求字段"""
+        headers = dict(headers or {})
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _lookup(self, url):
+        """读取索引条目的副本"""
+        with self._lock:
+            return dict(self._index.get(url) or {})
+
+    def contains(self, url):
+        """判断URL是否已有缓存"""
+        with self._lock:
+            return url in self._index
+
+    def _touch(self, url):
+        """更新最近使用时间"""
+        with self._lock:
+            if url in self._index:
+                self._index[url]['last_used'] = time.time()
+                self._save_index()
+
+    def _drop(self, url):
+        """删除失效条目"""
+        with self._lock:
+            self._remove(url)
+            self._save_index()
+
+    def _record(self, url, headers, encoding, size):
+        """登记新写入的缓存条目并按需淘汰"""
+        with self._lock:
+            self._index[url] = {
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'content_type': headers.get('Content-Type'),
+                'encoding': encoding,
+                'size': size,
+                'last_used': time.time()
+            }
+            self._evict()
+            self._save_index()
+
+    def _cacheable(self, headers, size):
+        """有校验信息且大小不超过上限的响应才写入缓存"""
+        return bool(headers.get('ETag') or headers.get('Last-Modified')) and size <= self.max_bytes
+
+    def _tmp_path(self, path):
+        """同目录下的临时文件路径（进程+线程唯一）"""
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _store(self, url, response):
+        """保存带校验信息的响应"""
+        if not self._cacheable(response.headers, len(response.content)):
+            return
+
+        body_path = self._body_path(url)
+        tmp_file = self._tmp_path(body_path)
+        with open(tmp_file, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp_file, body_path)
+        self._record(url, response.headers, response.encoding, len(response.content))
+
+    def get(self, url, **kwargs):
+        """发送带条件头的GET请求
+
+        Args:
+            url (str): 请求地址
+            **kwargs: 透传给 http_client.get 的参数
+
+        Returns:
+            CachedResponse: 响应，304时 from_cache 为 True
+        """
+        entry = self._lookup(url)
+        base_headers = kwargs.pop('headers', None)
+        response = http_client.get(url, headers=self._conditional_headers(entry, base_headers), **kwargs)
+
+        if response.status_code == 304 and entry:
+            body = self._read_body(url)
+            if body is not None:
+                self._touch(url)
+                return CachedResponse(
+                    200, body,
+                    headers={'Content-Type': entry.get('content_type') or ''},
+                    encoding=entry.get('encoding'),
+                    from_cache=True
+                )
+            # 索引存在但文件丢失，去掉条件头重新请求
+            self._drop(url)
+            response = http_client.get(url, headers=base_headers, **kwargs)
+
+        if response.status_code == 200:
+            try:
+                self._store(url, response)
+            except OSError as e:
+                print(f"写入HTTP缓存失败 {url}: {str(e)}")
+        elif response.status_code in (404, 410) and entry:
+            self._drop(url)
+
+        return CachedResponse(
+            response.status_code, response.content,
+            headers=response.headers,
+            encoding=response.encoding
+        )
+
+    def download(self, url, dest_path, chunk_size=65536, accept=None, **kwargs):
+        """以流式方式把响应体写入文件，带条件请求缓存
+
+        响应体按块写入，不会整体读入内存。
+
+        Args:
+            url (str): 请求地址
+            dest_path (str): 目标文件路径
+            chunk_size (int): 每次写入的块大小
+            accept (callable): 收到响应头后调用，返回 False 时不下载响应体（返回 415）
+            **kwargs: 透传给 http_client.get 的参数
+
+        Returns:
+            CachedResponse: 响应（content 为空），成功时 status_code 为 200
+        """
+        entry = self._lookup(url)
+        base_headers = kwargs.pop('headers', None)
+        headers = self._conditional_headers(entry, base_headers)
+
+        for _ in range(2):
+            response = http_client.get(url, headers=headers, stream=True, **kwargs)
+            with response:
+                if response.status_code == 304 and entry:
+                    body_path = self._body_path(url)
+                    if os.path.exists(body_path):
+                        tmp_file = self._tmp_path(dest_path)
+                        shutil.copyfile(body_path, tmp_file)
+                        os.replace(tmp_file, dest_path)
+                        self._touch(url)
+                        return CachedResponse(
+                            200, None,
+                            headers={'Content-Type': entry.get('content_type') or ''},
+                            from_cache=True
+                        )
+                    # 索引存在但文件丢失，去掉条件头重新请求
+                    self._drop(url)
+                    entry, headers = {}, base_headers
+                    continue
+
+                if response.status_code != 200:
+                    if response.status_code in (404, 410) and entry:
+                        self._drop(url)
+                    return CachedResponse(response.status_code, None, headers=response.headers)
+
+                if accept and not accept(response.headers):
+                    return CachedResponse(415, None, headers=response.headers)
+
+                tmp_file = self._tmp_path(dest_path)
+                size = 0
+                with open(tmp_file, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            size += len(chunk)
+                os.replace(tmp_file, dest_path)
+
+                if self._cacheable(response.headers, size):
+                    try:
+                        body_path = self._body_path(url)
+                        tmp_body = self._tmp_path(body_path)
+                        shutil.copyfile(dest_path, tmp_body)
+                        os.replace(tmp_body, body_path)
+                        self._record(url, response.headers, response.encoding, size)
+                    except OSError as e:
+                        print(f"写入HTTP缓存失败 {url}: {str(e)}")
+
+                return CachedResponse(200, None, headers=response.headers, encoding=response.encoding)
+
+        return CachedResponse(304, None)
+
+
+def get_http_cache():
+    """获取全局HTTP缓存"""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache()
+        return _http_cache
+
+
+def is_cached(url):
+    """判断URL是否已在HTTP缓存中"""
+    if os.getenv('HTTP_CACHE_ENABLED', 'true').lower() != 'true':
+        return False
+    return get_http_cache().contains(url)
+
+
+def cached_get(url, **kwargs):
+    """带条件请求缓存的GET；HTTP_CACHE_ENABLED=false 时直接请求"""
+    if os.getenv('HTTP_CACHE_ENABLED', 'true').lower() != 'true':
+        response = http_client.get(url, **kwargs)
+        return CachedResponse(response.status_code, response.content, response.headers, response.encoding)
+    return get_http_cache().get(url, **kwargs)
+
+
+def cached_download(url, dest_path, chunk_size=65536, accept=None, **kwargs):
+    """流式下载到文件，带条件请求缓存；HTTP_CACHE_ENABLED=false 时直接下载"""
+    if os.getenv('HTTP_CACHE_ENABLED', 'true').lower() != 'true':
+        with http_client.get(url, stream=True, **kwargs) as response:
+            if response.status_code != 200:
+                return CachedResponse(response.status_code, None, headers=response.headers)
+            if accept and not accept(response.headers):
+                return CachedResponse(415, None, headers=response.headers)
+            tmp_file = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        f.write(chunk)
+            os.replace(tmp_file, dest_path)
+            return CachedResponse(200, None, headers=response.headers, encoding=response.encoding)
+    return get_http_cache().download(url, dest_path, chunk_size=chunk_size, accept=accept, **kwargs)
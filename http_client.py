@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""共享HTTP客户端
+
+所有模块的网络请求都通过这里发出：
+- 复用同一个 requests.Session，按主机维护连接池（keep-alive）
+- 为每个请求设置默认的连接/读取超时
+- 按主机限制并发请求数
+
+相关环境变量：
+    HTTP_POOL_CONNECTIONS   缓存的主机连接池数量，默认 20
+    HTTP_POOL_MAXSIZE       每个主机连接池的最大连接数，默认 16
+    HTTP_CONNECT_TIMEOUT    连接超时（秒），默认 5
+    HTTP_READ_TIMEOUT       读取超时（秒），默认 30
+    HTTP_MAX_RETRIES        连接失败时的重试次数，默认 2
+    HTTP_HOST_CONCURRENCY   每个主机的默认最大并发数，默认 8
+    HTTP_HOST_LIMITS        按主机覆盖并发数，如 "api.github.com:4,api.weixin.qq.com:2"
+"""
+
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+
+_session = None
+_session_lock = threading.Lock()
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def _parse_host_limits(value):
+    """解析 HTTP_HOST_LIMITS 配置"""
+    limits = {}
+    for item in (value or '').split(','):
+        if ':' not in item:
+            continue
+        host, limit = item.rsplit(':', 1)
+        try:
+            limits[host.strip().lower()] = max(1, int(limit))
+        except ValueError:
+            print(f"忽略无效的主机并发配置: {item}")
+    return limits
+
+
+def get_timeout():
+    """获取默认超时 (connect, read)"""
+    return (
+        float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')),
+        float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+    )
+
+
+def get_session():
+    """获取全局共享的 Session"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_connections = int(os.getenv('HTTP_POOL_CONNECTIONS', '20'))
+            pool_maxsize = int(os.getenv('HTTP_POOL_MAXSIZE', '16'))
+            max_retries = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                max_retries=max_retries,
+                pool_block=False
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def get_host_semaphore(host):
+    """获取指定主机的并发限制信号量"""
+    host = (host or '').lower()
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            limits = _parse_host_limits(os.getenv('HTTP_HOST_LIMITS', ''))
+            default_limit = int(os.getenv('HTTP_HOST_CONCURRENCY', '8'))
+            _host_semaphores[host] = threading.BoundedSemaphore(limits.get(host, max(1, default_limit)))
+        return _host_semaphores[host]
+
+
+def request(method, url, **kwargs):
+    """发送HTTP请求
+
+    参数与 requests.request 相同；未指定 timeout 时使用默认超时。
+    stream=True 时并发限制只覆盖到响应头返回为止。
+
+    Returns:
+        requests.Response: 响应对象
+    """
+    kwargs.setdefault('timeout', get_timeout())
+    host = urlparse(url).hostname
+    with get_host_semaphore(host):
+        return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    """发送GET请求"""
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    """发送POST请求"""
+    return request('POST', url, **kwargs)
+
+
+def head(url, **kwargs):
+    """发送HEAD请求"""
+    kwargs.setdefault('allow_redirects', True)
+    return request('HEAD', url, **kwargs)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""并发图片下载器
+
+- 使用有界线程池并发下载README中的所有图片
+- 响应体按块流式写入磁盘，不整体读入内存
+- 同一URL在一次运行中只下载一次：进行中的请求会被合并，已完成的结果直接复用
+- 下载结果放入内容寻址的图片存储（见 image_store）
+- 响应类型不是微信支持的图片时不下载响应体（见 image_filter）
+- 新图片先探测头部，过小或过大的图片不完整下载（见 image_probe）
+
+相关环境变量：
+    IMAGE_DOWNLOAD_WORKERS   并发下载线程数，默认 8
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import http_cache
+import image_store
+import image_filter
+import image_probe
+
+_downloader = None
+_downloader_lock = threading.Lock()
+
+
+class ImageDownloader:
+    """图片下载器"""
+
+    def __init__(self, store=None, max_workers=None):
+        """初始化下载器
+
+        Args:
+            store (ImageStore): 图片存储，默认使用全局存储
+            max_workers (int): 并发下载线程数，默认读取 IMAGE_DOWNLOAD_WORKERS
+        """
+        self.store = store or image_store.get_image_store()
+        self.image_filter = image_filter.get_image_filter()
+        if max_workers is None:
+            max_workers = int(os.getenv('IMAGE_DOWNLOAD_WORKERS', '8'))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        # URL -> Future，进行中和已完成的下载都保存在这里
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _probe(self, url):
+        """完整下载前探测图片头部，返回跳过原因；已缓存的图片不探测"""
+        if os.getenv('IMAGE_PROBE_ENABLED', 'true').lower() != 'true' or http_cache.is_cached(url):
+            return None
+        try:
+            return image_probe.check_image(image_probe.probe_image(url))
+        except Exception as e:
+            print(f"探测图片失败 {url}: {str(e)}")
+            return None
+
+    def _download(self, url):
+        """下载单个图片，返回本地路径，失败返回 None"""
+        reason = self._probe(url)
+        if reason:
+            self.image_filter.record(reason)
+            print(f"跳过图片（{reason}）: {url}")
+            return None
+
+        tmp_path = self.store.temp_path()
+        try:
+            response = http_cache.cached_download(
+                url, tmp_path,
+                accept=lambda headers: self.image_filter.accept_content_type(headers.get('Content-Type'))
+            )
+            if response.status_code == 200:
+                # 服务器未返回大小时，下载后再检查一次
+                if os.path.getsize(tmp_path) > image_probe.get_max_bytes():
+                    self.image_filter.record('too_large')
+                    print(f"跳过图片（too_large）: {url}")
+                    return None
+                return self.store.put_file(url, tmp_path, response.headers.get('Content-Type'))
+            if response.status_code == 415:
+                print(f"跳过不支持的图片类型 {url}: {response.headers.get('Content-Type')}")
+            else:
+                print(f"下载图片失败 {url}: HTTP {response.status_code}")
+        except Exception as e:
+            print(f"下载图片失败 {url}: {str(e)}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return None
+
+    def submit(self, url):
+        """提交下载任务，相同URL复用同一个任务
+
+        Returns:
+            Future: 结果为本地路径或 None
+        """
+        with self._lock:
+            future = self._futures.get(url)
+            if future is None:
+                future = self._executor.submit(self._download, url)
+                self._futures[url] = future
+            return future
+
+    def download_all(self, urls):
+        """并发下载一组图片
+
+        Args:
+            urls (list): 图片URL列表，可包含重复项
+
+        Returns:
+            dict: URL -> 本地路径（失败为 None）
+        """
+        futures = {url: self.submit(url) for url in dict.fromkeys(urls)}
+        return {url: future.result() for url, future in futures.items()}
+
+
+def get_image_downloader():
+    """获取全局图片下载器，使同一次运行中的多个仓库共享下载结果"""
+    global _downloader
+    with _downloader_lock:
+        if _downloader is None:
+            _downloader = ImageDownloader()
+        return _downloader
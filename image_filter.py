@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""图片预过滤
+
+在下载和上传之前剔除对微信文章没有意义的图片：
+- 徽章（shields.io、CI状态、覆盖率等）
+- 访问统计 / 跟踪像素
+- SVG 等微信不支持的格式
+
+过滤原因会被计数，便于了解每篇文章省掉了多少网络请求。
+
+相关环境变量：
+    IMAGE_FILTER_ENABLED          是否启用，默认 true
+    IMAGE_FILTER_BLOCK_HOSTS      额外屏蔽的主机，逗号分隔
+    IMAGE_FILTER_BLOCK_PATTERNS   额外屏蔽的URL正则，逗号分隔
+"""
+
+import os
+import re
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+
+_image_filter = None
+_image_filter_lock = threading.Lock()
+
+# 徽章服务
+BADGE_HOSTS = {
+    'img.shields.io', 'shields.io', 'badgen.net', 'badge.fury.io', 'flat.badgen.net',
+    'travis-ci.org', 'travis-ci.com', 'api.travis-ci.com', 'circleci.com', 'dl.circleci.com',
+    'codecov.io', 'coveralls.io', 'img.badgesize.io', 'badges.gitter.im', 'api.codacy.com',
+    'app.codacy.com', 'api.codeclimate.com', 'goreportcard.com', 'pepy.tech', 'static.pepy.tech',
+    'david-dm.org', 'api.netlify.com', 'www.codefactor.io', 'sonarcloud.io',
+    'bestpractices.coreinfrastructure.org'
+}
+
+# 访问统计 / 跟踪像素服务
+TRACKING_HOSTS = {
+    'www.google-analytics.com', 'google-analytics.com', 'ga-beacon.appspot.com',
+    'hits.seeyoufarm.com', 'visitor-badge.laobi.icu', 'visitor-badge.glitch.me',
+    'komarev.com', 'profile-counter.glitch.me', 'count.getloli.com', 'hits.dwyl.com',
+    'api.visitorbadge.io', 'starchart.cc', 'repobeats.axiom.co'
+}
+
+# URL特征：徽章服务的主机见 BADGE_HOSTS，这里只匹配以 badge / badge.svg 结尾的地址和徽章样式参数，
+# 不匹配仓库中 docs/badges/、assets/shield/ 之类目录下的普通图片
+BADGE_PATTERNS = [
+    r'/badges?(\.svg)?(\?|#|$)',
+    r'/workflows/[^/]+/badge\.svg',
+    r'/actions/workflows/.+/badge',
+    r'[?&]style=(flat|for-the-badge|plastic|social)',
+]
+
+# 微信不支持或没有意义的扩展名
+BLOCKED_EXTENSIONS = ('.svg', '.svgz', '.ico')
+
+# 微信支持的图片类型
+ALLOWED_CONTENT_TYPES = ('image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/bmp', 'image/webp')
+
+
+class ImageFilter:
+    """图片分类器"""
+
+    def __init__(self, extra_hosts=None, extra_patterns=None):
+        """初始化分类器
+
+        Args:
+            extra_hosts (list): 额外屏蔽的主机，默认读取 IMAGE_FILTER_BLOCK_HOSTS
+            extra_patterns (list): 额外屏蔽的URL正则，默认读取 IMAGE_FILTER_BLOCK_PATTERNS
+        """
+        if extra_hosts is None:
+            extra_hosts = [h.strip() for h in os.getenv('IMAGE_FILTER_BLOCK_HOSTS', '').split(',') if h.strip()]
+        if extra_patterns is None:
+            extra_patterns = [p.strip() for p in os.getenv('IMAGE_FILTER_BLOCK_PATTERNS', '').split(',') if p.strip()]
+        self.badge_hosts = BADGE_HOSTS | {h.lower() for h in extra_hosts}
+        self.patterns = [re.compile(p, re.IGNORECASE) for p in BADGE_PATTERNS + extra_patterns]
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, reason):
+        """记录过滤原因"""
+        with self._lock:
+            self.stats[reason] += 1
+
+    def classify(self, url):
+        """根据URL判断是否跳过
+
+        Args:
+            url (str): 图片地址（完整URL或本地路径）
+
+        Returns:
+            str: 跳过原因（badge / tracking / unsupported_format / data_uri），保留时返回 None
+        """
+        if url.startswith('data:'):
+            return 'data_uri'
+        parsed = urlparse(url)
+        host = (parsed.hostname or '').lower()
+        path = parsed.path.lower()
+
+        if host in TRACKING_HOSTS or 'analytics' in host:
+            return 'tracking'
+        if host in self.badge_hosts or any(p.search(url) for p in self.patterns):
+            return 'badge'
+        if path.endswith(BLOCKED_EXTENSIONS):
+            return 'unsupported_format'
+        return None
+
+    def should_skip(self, url):
+        """判断是否跳过，并计数"""
+        if os.getenv('IMAGE_FILTER_ENABLED', 'true').lower() != 'true':
+            return False
+        reason = self.classify(url)
+        if reason:
+            self.record(reason)
+            return True
+        return False
+
+    def accept_content_type(self, content_type):
+        """根据响应的 Content-Type 判断是否保留（未知类型保留），并计数"""
+        if os.getenv('IMAGE_FILTER_ENABLED', 'true').lower() != 'true' or not content_type:
+            return True
+        mime = content_type.split(';')[0].strip().lower()
+        if mime in ALLOWED_CONTENT_TYPES or mime in ('application/octet-stream', 'binary/octet-stream'):
+            return True
+        self.record('unsupported_format' if mime.startswith('image/') else 'not_image')
+        return False
+
+    def summary(self):
+        """返回过滤统计的可读文本"""
+        with self._lock:
+            if not self.stats:
+                return "未跳过任何图片"
+            total = sum(self.stats.values())
+            detail = '，'.join(f"{reason}: {count}" for reason, count in self.stats.most_common())
+            return f"共跳过 {total} 张图片（{detail}）"
+
+
+def get_image_filter():
+    """获取全局图片分类器"""
+    global _image_filter
+    with _image_filter_lock:
+        if _image_filter is None:
+            _image_filter = ImageFilter()
+        return _image_filter
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""内容寻址的图片存储
+
+图片按内容的 SHA-256 命名保存在 images/ 目录下，索引（sqlite）记录 源URL -> 文件名 的映射
+以及每个文件的大小和最近使用时间。不同仓库的同名图片不会互相覆盖，
+相同内容的图片只保存一份；总大小超过预算时按最近最少使用（LRU）淘汰。
+
+索引的读写都在 sqlite 写事务中进行，批量并发处理或多个定时任务同时运行时不会丢失记录。
+下载或使用过的图片会被固定（记录在索引中，对所有进程可见），文章发布后由调用方解除固定；
+异常退出的进程留下的固定在 IMAGE_STORE_PIN_TTL 秒后失效。
+
+相关环境变量：
+    IMAGE_STORE_MAX_BYTES   图片目录总大小上限（字节），默认 500MB
+    IMAGE_STORE_PIN_TTL     固定的有效期（秒），默认 86400
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import mimetypes
+import threading
+from contextlib import contextmanager
+
+_image_store = None
+_image_store_lock = threading.Lock()
+
+# 可直接从URL中识别的图片扩展名
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.svg', '.ico')
+
+INDEX_NAME = 'index.sqlite3'
+LEGACY_INDEX_NAME = 'index.json'
+
+
+class ImageStore:
+    """内容寻址图片存储"""
+
+    def __init__(self, root='images', max_bytes=None, pin_ttl=None):
+        """初始化存储
+
+        Args:
+            root (str): 图片目录
+            max_bytes (int): 总大小上限，默认读取 IMAGE_STORE_MAX_BYTES
+            pin_ttl (int): 固定的有效期（秒），默认读取 IMAGE_STORE_PIN_TTL
+        """
+        self.root = root
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('IMAGE_STORE_MAX_BYTES', str(500 * 1024 * 1024)))
+        self.pin_ttl = pin_ttl if pin_ttl is not None else int(os.getenv('IMAGE_STORE_PIN_TTL', str(24 * 3600)))
+        self.index_file = os.path.join(root, INDEX_NAME)
+        # 本实例固定图片时使用的标识
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._conn = sqlite3.connect(self.index_file, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS objects (
+                name TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_objects_last_used ON objects (last_used);
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                name TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_urls_name ON urls (name);
+            CREATE TABLE IF NOT EXISTS pins (
+                name TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                pinned_at REAL NOT NULL,
+                PRIMARY KEY (name, owner)
+            );
+        ''')
+        self._adopt_files()
+
+    @contextmanager
+    def _transaction(self):
+        """写事务：线程间用锁互斥，进程间由 BEGIN IMMEDIATE 互斥"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _adopt_files(self):
+        """导入旧版 index.json，并登记索引中没有的文件，使其参与LRU淘汰"""
+        legacy_file = os.path.join(self.root, LEGACY_INDEX_NAME)
+        legacy = {}
+        if os.path.exists(legacy_file):
+            try:
+                with open(legacy_file, 'r', encoding='utf-8') as f:
+                    legacy = json.load(f)
+            except (OSError, ValueError):
+                legacy = {}
+        with self._transaction() as conn:
+            for name, obj in (legacy.get('objects') or {}).items():
+                if os.path.exists(self._path(name)):
+                    conn.execute(
+                        'INSERT OR IGNORE INTO objects (name, size, last_used) VALUES (?, ?, ?)',
+                        (name, obj.get('size') or os.path.getsize(self._path(name)), obj.get('last_used') or 0)
+                    )
+            for url, name in (legacy.get('urls') or {}).items():
+                conn.execute('INSERT OR IGNORE INTO urls (url, name) VALUES (?, ?)', (url, name))
+            known = {row[0] for row in conn.execute('SELECT name FROM objects')}
+            for entry in os.scandir(self.root):
+                if entry.name in known or entry.name.startswith(('.', 'index.')) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                conn.execute(
+                    'INSERT OR IGNORE INTO objects (name, size, last_used) VALUES (?, ?, ?)',
+                    (entry.name, stat.st_size, stat.st_mtime)
+                )
+        if legacy:
+            try:
+                os.remove(legacy_file)
+            except OSError:
+                pass
+
+    def _path(self, name):
+        """文件名对应的本地路径"""
+        return os.path.join(self.root, name)
+
+    def _evict(self, conn, now):
+        """按LRU淘汰未固定的文件，直到总大小不超过预算（在写事务中调用）"""
+        conn.execute('DELETE FROM pins WHERE pinned_at < ?', (now - self.pin_ttl,))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM objects').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for name, size in conn.execute(
+            'SELECT name, size FROM objects WHERE name NOT IN (SELECT name FROM pins) ORDER BY last_used'
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
+            conn.execute('DELETE FROM objects WHERE name = ?', (name,))
+            conn.execute('DELETE FROM urls WHERE name = ?', (name,))
+            total -= size
+
+    @staticmethod
+    def _extension(url, content_type=None):
+        """推断图片扩展名"""
+        ext = os.path.splitext(url.split('?')[0].split('#')[0])[1].lower()
+        if ext in IMAGE_EXTENSIONS:
+            return ext
+        if content_type:
+            guessed = mimetypes.guess_extension(content_type.split(';')[0].strip())
+            if guessed:
+                return '.jpg' if guessed == '.jpe' else guessed
+        return '.jpg'
+
+    @staticmethod
+    def _hash_file(path, chunk_size=65536):
+        """流式计算文件的 SHA-256"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def temp_path(self):
+        """下载用的临时文件路径（与存储目录在同一文件系统）"""
+        return self._path(f".download.{os.getpid()}.{threading.get_ident()}.{time.time_ns()}.tmp")
+
+    def lookup(self, url):
+        """查找URL对应的本地文件
+
+        Returns:
+            str: 本地路径，不存在时返回 None
+        """
+        with self._transaction() as conn:
+            row = conn.execute('SELECT name FROM urls WHERE url = ?', (url,)).fetchone()
+            if not row or not os.path.exists(self._path(row[0])):
+                return None
+            self._mark_used(conn, row[0], time.time())
+            return self._path(row[0])
+
+    def put_file(self, url, tmp_path, content_type=None):
+        """把下载好的临时文件放入存储
+
+        Args:
+            url (str): 图片源URL
+            tmp_path (str): 已下载的临时文件
+            content_type (str): 响应的 Content-Type，用于推断扩展名
+
+        Returns:
+            str: 存储中的本地路径
+        """
+        name = self._hash_file(tmp_path) + self._extension(url, content_type)
+        path = self._path(name)
+        size = os.path.getsize(tmp_path)
+        now = time.time()
+        # 放入文件和淘汰在同一事务中进行，避免刚放入的文件被其他进程删除
+        with self._transaction() as conn:
+            # 内容相同的文件已存在时直接丢弃临时文件
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+            conn.execute('INSERT OR REPLACE INTO urls (url, name) VALUES (?, ?)', (url, name))
+            conn.execute(
+                'INSERT INTO objects (name, size, last_used) VALUES (?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET size = excluded.size',
+                (name, size, now)
+            )
+            self._mark_used(conn, name, now)
+            self._evict(conn, now)
+        return path
+
+    def resolve(self, local_path):
+        """解析文章中引用的本地图片路径，并刷新其使用时间
+
+        Args:
+            local_path (str): 如 images/<hash>.png
+
+        Returns:
+            str: 文件存在时返回路径，否则返回 None
+        """
+        if not os.path.exists(local_path):
+            return None
+        name = os.path.basename(local_path)
+        with self._transaction() as conn:
+            if conn.execute('SELECT 1 FROM objects WHERE name = ?', (name,)).fetchone():
+                self._mark_used(conn, name, time.time())
+        return local_path
+
+    def unpin(self, local_paths):
+        """解除本实例对这些图片的固定（文章发布后调用），并按预算淘汰
+
+        Args:
+            local_paths (list): 图片的本地路径
+        """
+        names = {os.path.basename(path) for path in local_paths if path}
+        if not names:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                'DELETE FROM pins WHERE name = ? AND owner = ?',
+                [(name, self.owner) for name in names]
+            )
+            self._evict(conn, time.time())
+
+    def _mark_used(self, conn, name, now):
+        """刷新使用时间并固定（在写事务中调用）"""
+        if conn.execute('UPDATE objects SET last_used = ? WHERE name = ?', (now, name)).rowcount == 0:
+            try:
+                size = os.path.getsize(self._path(name))
+            except OSError:
+                size = 0
+            conn.execute('INSERT INTO objects (name, size, last_used) VALUES (?, ?, ?)', (name, size, now))
+        conn.execute(
+            'INSERT OR REPLACE INTO pins (name, owner, pinned_at) VALUES (?, ?, ?)',
+            (name, self.owner, now)
+        )
+
+
+def get_image_store():
+    """获取全局图片存储"""
+    global _image_store
+    with _image_store_lock:
+        if _image_store is None:
+            _image_store = ImageStore()
+        return _image_store
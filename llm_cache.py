@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""大模型响应缓存
+
+以（规范化内容哈希、提示词模板版本、模型、max_tokens）为键持久化保存分析结果，
+相同输入再次运行时不再调用大模型。条目带TTL，总大小超过上限时按最近最少使用（LRU）淘汰。
+
+相关环境变量：
+    LLM_CACHE_ENABLED     是否启用，默认 true
+    LLM_CACHE_TTL         有效期（秒），默认 30 天
+    LLM_CACHE_MAX_BYTES   总大小上限（字节），默认 50MB
+    LLM_CACHE_FILE        缓存文件路径，默认 CACHE_DIR/llm_cache.sqlite3
+    LLM_CACHE_REFRESH     为 true 时忽略已有缓存并重新请求（结果仍会写入）
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from state_store import content_hash
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def make_key(content, prompt_version, model, max_tokens, **extra):
+    """生成缓存键
+
+    Args:
+        content (str): 输入内容
+        prompt_version (str): 提示词模板版本
+        model (str): 模型名
+        max_tokens (int): 最大输出token数
+        **extra: 其他会影响输出的参数（如输出模式）
+
+    Returns:
+        str: 缓存键
+    """
+    parts = [content_hash(content), str(prompt_version), model, str(max_tokens)]
+    parts.extend(f'{name}={extra[name]}' for name in sorted(extra))
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """大模型响应缓存（sqlite）"""
+
+    def __init__(self, cache_file=None, ttl=None, max_bytes=None):
+        """初始化缓存
+
+        Args:
+            cache_file (str): 缓存文件路径，默认读取 LLM_CACHE_FILE
+            ttl (int): 有效期（秒），默认读取 LLM_CACHE_TTL
+            max_bytes (int): 总大小上限，默认读取 LLM_CACHE_MAX_BYTES
+        """
+        self.cache_file = cache_file or os.getenv('LLM_CACHE_FILE') or os.path.join(os.getenv('CACHE_DIR', '.cache'), 'llm_cache.sqlite3')
+        self.ttl = ttl if ttl is not None else int(os.getenv('LLM_CACHE_TTL', str(30 * 24 * 3600)))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('LLM_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.cache_file, check_same_thread=False)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used);
+        ''')
+        self._conn.commit()
+
+    def get(self, key):
+        """读取未过期的缓存，不存在时返回 None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT response, created_at FROM responses WHERE cache_key = ?', (key,)
+            ).fetchone()
+            if not row:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute('DELETE FROM responses WHERE cache_key = ?', (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute('UPDATE responses SET last_used = ? WHERE cache_key = ?', (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key, response):
+        """写入缓存并按需淘汰"""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (cache_key, response, size, created_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, response, size, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """删除过期条目，再按LRU淘汰到总大小不超过上限（调用方持有锁）"""
+        self._conn.execute('DELETE FROM responses WHERE created_at < ?', (now - self.ttl,))
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            'SELECT cache_key, size FROM responses ORDER BY last_used'
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM responses WHERE cache_key = ?', (key,))
+            total -= size
+
+
+def get_llm_cache():
+    """获取全局大模型响应缓存"""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache()
+        return _llm_cache
+
+
+def is_enabled():
+    """是否启用缓存"""
+    return os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def should_refresh():
+    """是否强制刷新缓存"""
+    return os.getenv('LLM_CACHE_REFRESH', 'false').lower() == 'true'
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""大模型用量账本
+
+记录每次大模型请求的提示词 / 输出token数、命中服务端提示词缓存的token数、延迟和估算费用（按文章归类），
+追加写入本地账本文件，并汇总本次运行和当天的用量。
+超过预算后不再发起新的大模型请求（缓存命中不受影响）。
+
+相关环境变量：
+    LLM_LEDGER_FILE           账本文件路径，默认 CACHE_DIR/llm_ledger.jsonl
+    LLM_PRICES                模型单价（美元 / 百万token，输入/输出），逗号分隔，如 gpt-4o:2.5/10
+    LLM_RUN_BUDGET            单次运行费用上限（美元），0 表示不限，默认 0
+    LLM_DAILY_BUDGET          每天费用上限（美元），0 表示不限，默认 0
+    LLM_RUN_TOKEN_BUDGET      单次运行token上限，0 表示不限，默认 0
+    LLM_DAILY_TOKEN_BUDGET    每天token上限，0 表示不限，默认 0
+"""
+
+import os
+import json
+import time
+import threading
+import contextvars
+from datetime import date
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+# 当前请求所属的文章（跨线程时通过 contextvars.copy_context() 传递）
+current_article = contextvars.ContextVar('llm_article', default=None)
+
+# 默认单价（美元 / 百万token，输入, 输出）
+DEFAULT_PRICES = {
+    'gpt-4o': (2.5, 10.0),
+    'gpt-4o-mini': (0.15, 0.6),
+    'gpt-4-turbo': (10.0, 30.0),
+    'gpt-4-turbo-preview': (10.0, 30.0),
+    'gpt-4': (30.0, 60.0),
+    'gpt-3.5-turbo': (0.5, 1.5),
+    'stub': (0.0, 0.0)
+}
+
+
+class BudgetExceeded(Exception):
+    """大模型用量超过预算"""
+
+
+def _load_prices():
+    """合并默认单价和 LLM_PRICES"""
+    prices = dict(DEFAULT_PRICES)
+    for entry in os.getenv('LLM_PRICES', '').split(','):
+        model, _, price = entry.strip().partition(':')
+        prompt_price, _, completion_price = price.partition('/')
+        try:
+            prices[model.strip()] = (float(prompt_price), float(completion_price or prompt_price))
+        except ValueError:
+            continue
+    return prices
+
+
+def _empty_totals():
+    return {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0,
+            'latency': 0.0, 'cost': 0.0}
+
+
+def _add(totals, entry):
+    totals['requests'] += 1
+    for field in ('prompt_tokens', 'completion_tokens', 'cached_tokens', 'latency', 'cost'):
+        totals[field] += entry.get(field) or 0
+
+
+class Ledger:
+    """大模型用量账本"""
+
+    def __init__(self, ledger_file=None):
+        """初始化账本
+
+        Args:
+            ledger_file (str): 账本文件路径，默认读取 LLM_LEDGER_FILE
+        """
+        self.ledger_file = ledger_file or os.getenv('LLM_LEDGER_FILE') or os.path.join(os.getenv('CACHE_DIR', '.cache'), 'llm_ledger.jsonl')
+        self.prices = _load_prices()
+        self.run_budget = float(os.getenv('LLM_RUN_BUDGET', '0'))
+        self.daily_budget = float(os.getenv('LLM_DAILY_BUDGET', '0'))
+        self.run_token_budget = int(os.getenv('LLM_RUN_TOKEN_BUDGET', '0'))
+        self.daily_token_budget = int(os.getenv('LLM_DAILY_TOKEN_BUDGET', '0'))
+        self._lock = threading.Lock()
+        self.run = _empty_totals()
+        self.articles = {}
+        self._day = date.today().isoformat()
+        self.day = self._load_day(self._day)
+
+    def _load_day(self, day):
+        """从账本文件汇总当天已有的用量"""
+        totals = _empty_totals()
+        try:
+            with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get('date') == day:
+                        _add(totals, entry)
+        except OSError:
+            pass
+        return totals
+
+    def cost(self, model, prompt_tokens, completion_tokens, cached_tokens=0):
+        """估算费用（美元），命中提示词缓存的输入按半价计，未知模型按0计"""
+        price = self.prices.get(model)
+        if price is None:
+            # 带日期后缀的模型名（如 gpt-4o-2024-08-06）按最长前缀匹配
+            matches = [name for name in self.prices if model and model.startswith(name)]
+            price = self.prices[max(matches, key=len)] if matches else (0.0, 0.0)
+        uncached = max(0, prompt_tokens - cached_tokens)
+        return (uncached * price[0] + cached_tokens * price[0] / 2 + completion_tokens * price[1]) / 1_000_000
+
+    def record(self, model, prompt_tokens, completion_tokens, latency, cached_tokens=0, prefix=None, estimated=False):
+        """记录一次请求
+
+        Args:
+            model (str): 模型名
+            prompt_tokens (int): 提示词token数
+            completion_tokens (int): 输出token数
+            latency (float): 请求耗时（秒）
+            cached_tokens (int): 命中服务端提示词缓存的token数
+            prefix (str): 提示词静态前缀的标识，用于按前缀统计缓存命中率
+            estimated (bool): token数是否为估算值（流式请求没有返回用量）
+
+        Returns:
+            dict: 账本记录
+        """
+        entry = {
+            'time': time.time(),
+            'date': date.today().isoformat(),
+            'article': current_article.get(),
+            'model': model,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'cached_tokens': cached_tokens,
+            'prefix': prefix,
+            'latency': round(latency, 3),
+            'cost': round(self.cost(model, prompt_tokens, completion_tokens, cached_tokens), 6),
+            'estimated': estimated
+        }
+        with self._lock:
+            if entry['date'] != self._day:
+                self._day = entry['date']
+                self.day = _empty_totals()
+            _add(self.run, entry)
+            _add(self.day, entry)
+            _add(self.articles.setdefault(entry['article'], _empty_totals()), entry)
+            try:
+                os.makedirs(os.path.dirname(self.ledger_file) or '.', exist_ok=True)
+                with open(self.ledger_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            except OSError as e:
+                print(f"写入大模型用量账本失败: {str(e)}")
+        return entry
+
+    def record_response(self, response, model, latency, prefix=None):
+        """从 openai 响应的 usage 字段记录用量（含 prompt_tokens_details.cached_tokens）"""
+        usage = response.get('usage') or {}
+        details = usage.get('prompt_tokens_details') or {}
+        return self.record(
+            response.get('model') or model,
+            usage.get('prompt_tokens') or 0,
+            usage.get('completion_tokens') or 0,
+            latency,
+            cached_tokens=details.get('cached_tokens') or 0,
+            prefix=prefix
+        )
+
+    def check_budget(self):
+        """超过任一预算时抛出 BudgetExceeded"""
+        with self._lock:
+            run_tokens = self.run['prompt_tokens'] + self.run['completion_tokens']
+            day_tokens = self.day['prompt_tokens'] + self.day['completion_tokens']
+            if self.run_budget and self.run['cost'] >= self.run_budget:
+                raise BudgetExceeded(f"本次运行大模型费用已达 ${self.run['cost']:.4f}，超过预算 ${self.run_budget}")
+            if self.daily_budget and self.day['cost'] >= self.daily_budget:
+                raise BudgetExceeded(f"今日大模型费用已达 ${self.day['cost']:.4f}，超过预算 ${self.daily_budget}")
+            if self.run_token_budget and run_tokens >= self.run_token_budget:
+                raise BudgetExceeded(f"本次运行已用 {run_tokens} tokens，超过预算 {self.run_token_budget}")
+            if self.daily_token_budget and day_tokens >= self.daily_token_budget:
+                raise BudgetExceeded(f"今日已用 {day_tokens} tokens，超过预算 {self.daily_token_budget}")
+
+    def summary(self, article=None):
+        """返回用量统计的可读文本（指定 article 时只统计该文章）"""
+        with self._lock:
+            totals = dict(self.articles.get(article) or _empty_totals()) if article else dict(self.run)
+            day = dict(self.day)
+        hit_rate = totals['cached_tokens'] / totals['prompt_tokens'] if totals['prompt_tokens'] else 0
+        text = (
+            f"大模型用量：{totals['requests']} 次请求，输入 {totals['prompt_tokens']} tokens"
+            f"（提示词缓存命中 {totals['cached_tokens']}，{hit_rate:.0%}），输出 {totals['completion_tokens']} tokens，"
+            f"耗时 {totals['latency']:.1f} 秒，费用约 ${totals['cost']:.4f}"
+        )
+        if not article:
+            text += f"；今日累计约 ${day['cost']:.4f}"
+        return text
+
+
+def get_ledger():
+    """获取全局用量账本"""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = Ledger()
+        return _ledger
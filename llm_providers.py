@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""大模型服务提供方
+
+按顺序配置多个兼容 OpenAI 接口的服务（地址 + 模型），请求时：
+- 优先使用排在前面且健康的服务，失败时依次切换到后面的服务
+- 对冲请求：首个请求超过 LLM_HEDGE_DELAY 秒未返回时，向下一个服务（只有一个服务时向同一个服务）再发一次，
+  取先完成的结果；额外请求同样经调度器预占配额，落败请求的用量照常记账
+- 记录每个服务的延迟和连续失败次数，连续失败达到阈值后冷却一段时间
+- 内置确定性的本地桩服务（stub），不访问网络，用于测试和基准测试
+
+相关环境变量：
+    LLM_PROVIDERS                  服务列表，逗号分隔，每项为 名称:模型，如 openai:gpt-4o,backup:gpt-4o-mini,stub
+                                   未配置时为 openai:OPENAI_MODEL
+    LLM_PROVIDER_<名称>_API_BASE   该服务的接口地址（openai 默认使用 OPENAI_API_BASE）
+    LLM_PROVIDER_<名称>_API_KEY    该服务的密钥（openai 默认使用 OPENAI_API_KEY）
+    LLM_HEDGE_DELAY                对冲请求的延迟秒数，0 表示不对冲，默认 0
+    LLM_PROVIDER_MAX_FAILURES      连续失败多少次后进入冷却，默认 3
+    LLM_PROVIDER_COOLDOWN          冷却秒数，默认 300
+    LLM_STUB_LATENCY               本地桩服务模拟的延迟秒数，默认 0
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import openai
+
+_provider_pool = None
+_provider_pool_lock = threading.Lock()
+
+
+class _Response(dict):
+    """与 openai 返回对象一致的访问方式（既可用属性也可用下标）"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def _wrap(value):
+    """把嵌套的字典和列表转换为 _Response"""
+    if isinstance(value, dict):
+        return _Response({k: _wrap(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_wrap(v) for v in value]
+    return value
+
+
+class Provider:
+    """兼容 OpenAI 接口的服务"""
+
+    kind = 'openai'
+
+    def __init__(self, name, model, api_base=None, api_key=None):
+        self.name = name
+        self.model = model
+        self.api_base = api_base
+        self.api_key = api_key
+
+    def complete(self, messages, max_tokens, **kwargs):
+        """发送一次对话补全请求，返回 openai 响应对象（stream=True 时为分块迭代器）"""
+        options = {}
+        if self.api_base:
+            options['api_base'] = self.api_base
+        if self.api_key:
+            options['api_key'] = self.api_key
+        return openai.ChatCompletion.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            **options,
+            **kwargs
+        )
+
+
+class StubProvider(Provider):
+    """确定性的本地桩服务
+
+    不访问网络。按提示词中列出的章节（`- 章节名：要求`）生成固定格式的文章，
+    相同输入总是得到相同输出，便于测试整条流水线和做基准测试。
+    同一个 system 前缀第二次出现时，在 usage 中模拟服务端提示词缓存命中。
+    """
+
+    kind = 'stub'
+
+    def __init__(self, name='stub', model='stub', latency=None):
+        super().__init__(name, model)
+        self.latency = latency if latency is not None else float(os.getenv('LLM_STUB_LATENCY', '0'))
+        self._seen_prefixes = set()
+        self._lock = threading.Lock()
+
+    def _generate(self, messages, max_tokens, structured=False):
+        """生成文章文本（structured 为 True 时输出 JSON 对象）"""
+        # 第一条 user 消息是README内容，其余消息是写作要求
+        user_messages = [m['content'] for m in messages if m['role'] == 'user']
+        readme = user_messages[0] if user_messages else ''
+        instructions = '\n'.join(m['content'] for m in messages if m['content'] is not readme)
+        digest = hashlib.sha256('\0'.join(m['content'] for m in messages).encode('utf-8')).hexdigest()[:8]
+        headings = re.findall(r'^#+\s*(.+)$', readme, re.MULTILINE)
+        subject = headings[0].strip() if headings else f'项目 {digest}'
+        names = re.findall(r'^\s+- ([^：\s]+)：', instructions, re.MULTILINE)
+        if structured:
+            return json.dumps({
+                name: subject if name == 'title' else f"{subject} 的{name}（{digest}）" for name in names
+            }, ensure_ascii=False)
+        if not names:
+            return f"{subject}（{digest}）"
+        lines = []
+        for name in names:
+            if name == '标题':
+                lines.append(f"# {subject}")
+            else:
+                lines.extend(['', f"## {name}", f"{subject} 的{name}（{digest}）"])
+        return '\n'.join(lines).strip()[:max_tokens * 4]
+
+    def complete(self, messages, max_tokens, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        structured = (kwargs.get('response_format') or {}).get('type') == 'json_object'
+        content = self._generate(messages, max_tokens, structured=structured)
+        prompt_tokens = sum(len(m['content']) for m in messages) // 4
+        system = ''.join(m['content'] for m in messages if m['role'] == 'system')
+        with self._lock:
+            cached_tokens = len(system) // 4 if system in self._seen_prefixes else 0
+            self._seen_prefixes.add(system)
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': len(content) // 4,
+                 'total_tokens': prompt_tokens + len(content) // 4,
+                 'prompt_tokens_details': {'cached_tokens': cached_tokens}}
+        if kwargs.get('stream'):
+            pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+            return iter([_wrap({'choices': [{'delta': {'content': piece}, 'index': 0}]}) for piece in pieces])
+        return _wrap({
+            'model': self.model,
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': usage
+        })
+
+
+class ProviderPool:
+    """服务列表：健康跟踪、故障切换和对冲请求"""
+
+    def __init__(self, providers, hedge_delay=None, max_failures=None, cooldown=None):
+        """初始化服务列表
+
+        Args:
+            providers (list): Provider 列表，按优先级排序
+            hedge_delay (float): 对冲请求延迟秒数，默认读取 LLM_HEDGE_DELAY
+            max_failures (int): 连续失败次数阈值，默认读取 LLM_PROVIDER_MAX_FAILURES
+            cooldown (int): 冷却秒数，默认读取 LLM_PROVIDER_COOLDOWN
+        """
+        if not providers:
+            raise ValueError("未配置大模型服务")
+        self.providers = providers
+        self.hedge_delay = hedge_delay if hedge_delay is not None else float(os.getenv('LLM_HEDGE_DELAY', '0'))
+        self.max_failures = max_failures if max_failures is not None else int(os.getenv('LLM_PROVIDER_MAX_FAILURES', '3'))
+        self.cooldown = cooldown if cooldown is not None else int(os.getenv('LLM_PROVIDER_COOLDOWN', '300'))
+        self._lock = threading.Lock()
+        # 服务名 -> {'requests', 'failures', 'consecutive_failures', 'latency', 'unhealthy_until'}
+        self._health = {p.name: {'requests': 0, 'failures': 0, 'consecutive_failures': 0,
+                                 'latency': None, 'unhealthy_until': 0} for p in providers}
+        self._executor = ThreadPoolExecutor(max_workers=max(4, len(providers) * 4))
+
+    @property
+    def primary(self):
+        """优先级最高的服务"""
+        return self.providers[0]
+
+    def health(self):
+        """返回各服务的健康状态副本"""
+        with self._lock:
+            return {name: dict(state) for name, state in self._health.items()}
+
+    def _ordered(self):
+        """健康的服务在前，冷却中的服务作为最后的备选"""
+        now = time.time()
+        with self._lock:
+            healthy = [p for p in self.providers if self._health[p.name]['unhealthy_until'] <= now]
+        return healthy + [p for p in self.providers if p not in healthy]
+
+    def _record(self, provider, latency=None, error=None):
+        """记录一次请求结果"""
+        with self._lock:
+            state = self._health[provider.name]
+            state['requests'] += 1
+            if error is None:
+                state['consecutive_failures'] = 0
+                state['unhealthy_until'] = 0
+                state['latency'] = latency if state['latency'] is None else state['latency'] * 0.8 + latency * 0.2
+                return
+            state['failures'] += 1
+            state['consecutive_failures'] += 1
+            if state['consecutive_failures'] >= self.max_failures:
+                state['unhealthy_until'] = time.time() + self.cooldown
+        print(f"大模型服务 {provider.name} 请求失败: {str(error)}")
+
+    def _call(self, provider, messages, max_tokens, **kwargs):
+        """调用单个服务并记录健康状态"""
+        started = time.time()
+        try:
+            response = provider.complete(messages, max_tokens, **kwargs)
+        except Exception as e:
+            self._record(provider, error=e)
+            raise
+        self._record(provider, latency=time.time() - started)
+        return response
+
+    def _attempt(self, provider, messages, max_tokens, before=None, **kwargs):
+        """发出一次请求，返回 (响应, 耗时)；before 不为空时先调用它（为额外请求预占配额）"""
+        if before:
+            before()
+        started = time.time()
+        response = self._call(provider, messages, max_tokens, **kwargs)
+        return response, time.time() - started
+
+    @staticmethod
+    def _discard(futures, on_discarded):
+        """取消未开始的落败请求；已发出的请求完成后交给 on_discarded 记账"""
+        def report(future):
+            if future.cancelled() or future.exception() is not None:
+                return
+            response, latency = future.result()
+            try:
+                on_discarded(response, latency)
+            except Exception as e:
+                print(f"记录对冲请求用量失败: {str(e)}")
+
+        for future in futures:
+            if not future.cancel() and on_discarded:
+                future.add_done_callback(report)
+
+    def complete(self, messages, max_tokens, before_extra=None, on_discarded=None, **kwargs):
+        """按优先级请求，失败时切换服务；启用对冲时慢请求会同时发往下一个服务
+        
+        只配置了一个服务时，对冲请求发往同一个服务。
+        
+        Args:
+            messages (list): 对话消息
+            max_tokens (int): 最大输出token数
+            before_extra (callable): 发出故障切换或对冲请求前在工作线程中调用（可阻塞），
+                用于为调度器只按一次请求预占的配额补充预占
+            on_discarded (callable): 对冲中落败但已发出的请求完成后以 (响应, 耗时) 调用，用于记账
+
+        Returns:
+            openai 响应对象（stream=True 时为分块迭代器，流式请求不对冲）
+        """
+        candidates = self._ordered()
+        if kwargs.get('stream') or self.hedge_delay <= 0:
+            last_error = None
+            for index, provider in enumerate(candidates):
+                try:
+                    return self._attempt(provider, messages, max_tokens,
+                                         before=before_extra if index else None, **kwargs)[0]
+                except Exception as e:
+                    last_error = e
+            raise last_error
+
+        remaining = list(candidates) if len(candidates) > 1 else candidates * 2
+        pending = set()
+        sent = 0
+        last_error = None
+        while remaining or pending:
+            if remaining:
+                provider = remaining.pop(0)
+                pending.add(self._executor.submit(
+                    self._attempt, provider, messages, max_tokens,
+                    before=before_extra if sent else None, **kwargs
+                ))
+                sent += 1
+            # 还有备选服务时最多等待 hedge_delay 秒，超时后再发出一个对冲请求
+            done, pending = wait(pending, timeout=self.hedge_delay if remaining else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()[0]
+                except Exception as e:
+                    last_error = e
+                    continue
+                self._discard(pending | (done - {future}), on_discarded)
+                return response
+        raise last_error
+
+def load_providers(default_model='gpt-4o'):
+    """根据 LLM_PROVIDERS 创建服务列表"""
+    providers = []
+    entries = [e.strip() for e in os.getenv('LLM_PROVIDERS', '').split(',') if e.strip()]
+    if not entries:
+        entries = [f"openai:{default_model}"]
+    for entry in entries:
+        name, _, model = entry.partition(':')
+        name = name.strip()
+        model = model.strip() or default_model
+        if name == 'stub':
+            providers.append(StubProvider(model=model if model != default_model else 'stub'))
+            continue
+        prefix = f"LLM_PROVIDER_{re.sub(r'[^A-Za-z0-9]', '_', name).upper()}"
+        api_base = os.getenv(f'{prefix}_API_BASE')
+        api_key = os.getenv(f'{prefix}_API_KEY')
+        if name == 'openai':
+            api_base = api_base or os.getenv('OPENAI_API_BASE') or None
+            api_key = api_key or os.getenv('OPENAI_API_KEY') or None
+        providers.append(Provider(name, model, api_base=api_base, api_key=api_key))
+    return providers
+
+
+def get_provider_pool(default_model='gpt-4o'):
+    """获取全局服务列表"""
+    global _provider_pool
+    with _provider_pool_lock:
+        if _provider_pool is None:
+            _provider_pool = ProviderPool(load_providers(default_model))
+        return _provider_pool
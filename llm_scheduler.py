@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""大模型请求调度器
+
+批量生成文章时，所有大模型请求都经过同一个调度器：
+- 按每分钟请求数（RPM）和每分钟token数（TPM）两个令牌桶限速，token数由提示词长度和 max_tokens 估算
+- 限制同时进行的请求数
+- 遇到 429 / 5xx / 超时时重试，优先遵循 Retry-After，否则使用带随机抖动的指数退避
+- 统计排队深度、重试次数和等待时间
+
+相关环境变量：
+    LLM_RPM                 每分钟请求数上限，0 表示不限，默认 500
+    LLM_TPM                 每分钟token数上限，0 表示不限，默认 30000
+    LLM_MAX_CONCURRENCY     最大并发请求数，默认 4
+    LLM_MAX_RETRIES         最大重试次数，默认 4
+    LLM_RETRY_BASE_DELAY    退避基准秒数，默认 2
+    LLM_RETRY_MAX_DELAY     单次退避上限秒数，默认 60
+"""
+
+import os
+import time
+import random
+import threading
+
+_llm_scheduler = None
+_llm_scheduler_lock = threading.Lock()
+
+# 可重试的错误类型（按类名匹配，避免依赖具体的 SDK 版本）
+RETRYABLE_ERRORS = ('RateLimitError', 'ServiceUnavailableError', 'APIConnectionError', 'Timeout', 'TryAgain', 'APITimeoutError')
+RETRYABLE_STATUS = (408, 409, 429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """按分钟补充的令牌桶，允许预支（预支部分通过等待偿还）"""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def reserve(self, amount, now):
+        """预占令牌，返回需要等待的秒数（调用方持有锁）"""
+        if self.capacity <= 0:
+            return 0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # 单次请求超过桶容量时按容量计，避免永远无法发送
+        self.tokens -= min(amount, self.capacity)
+        return -self.tokens / self.rate if self.tokens < 0 else 0
+
+
+class LLMScheduler:
+    """大模型请求调度器"""
+
+    def __init__(self, rpm=None, tpm=None, max_concurrency=None, max_retries=None):
+        """初始化调度器
+
+        Args:
+            rpm (int): 每分钟请求数上限，默认读取 LLM_RPM
+            tpm (int): 每分钟token数上限，默认读取 LLM_TPM
+            max_concurrency (int): 最大并发请求数，默认读取 LLM_MAX_CONCURRENCY
+            max_retries (int): 最大重试次数，默认读取 LLM_MAX_RETRIES
+        """
+        rpm = rpm if rpm is not None else int(os.getenv('LLM_RPM', '500'))
+        tpm = tpm if tpm is not None else int(os.getenv('LLM_TPM', '30000'))
+        max_concurrency = max_concurrency or int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('LLM_MAX_RETRIES', '4'))
+        self.base_delay = float(os.getenv('LLM_RETRY_BASE_DELAY', '2'))
+        self.max_delay = float(os.getenv('LLM_RETRY_MAX_DELAY', '60'))
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'queued': 0,
+            'in_flight': 0,
+            'max_queue_depth': 0,
+            'wait_seconds': 0.0
+        }
+
+    def _reserve(self, estimated_tokens):
+        """按两个令牌桶预占配额，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            return max(self._requests.reserve(1, now), self._tokens.reserve(estimated_tokens, now))
+
+    def _retry_delay(self, error, attempt):
+        """判断错误是否可重试，返回等待秒数；不可重试时返回 None"""
+        status = getattr(error, 'http_status', None) or getattr(error, 'status_code', None)
+        if type(error).__name__ not in RETRYABLE_ERRORS and status not in RETRYABLE_STATUS:
+            return None
+        headers = getattr(error, 'headers', None) or {}
+        retry_after = headers.get('Retry-After') or headers.get('retry-after')
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay) + random.uniform(0, 1)
+            except ValueError:
+                pass
+        # 指数退避 + 全抖动
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _count(self, name, delta):
+        with self._lock:
+            self.stats[name] += delta
+            if name == 'queued':
+                self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self.stats['queued'])
+
+    def call(self, func, estimated_tokens=0):
+        """按配额调度执行一次大模型请求
+
+        Args:
+            func (callable): 发送请求的函数（无参数）
+            estimated_tokens (int): 估算的token数（提示词 + max_tokens）
+
+        Returns:
+            func 的返回值
+        """
+        self._count('queued', 1)
+        queued = True
+        try:
+            with self._slots:
+                self._count('queued', -1)
+                queued = False
+                self._count('in_flight', 1)
+                try:
+                    for attempt in range(self.max_retries + 1):
+                        delay = self._reserve(estimated_tokens)
+                        if delay > 0:
+                            self._count('wait_seconds', delay)
+                            time.sleep(delay)
+                        self._count('requests', 1)
+                        try:
+                            return func()
+                        except Exception as e:
+                            retry_delay = self._retry_delay(e, attempt)
+                            if retry_delay is None or attempt == self.max_retries:
+                                self._count('failures', 1)
+                                raise
+                            print(f"大模型请求失败（{type(e).__name__}），{retry_delay:.1f} 秒后重试")
+                            self._count('retries', 1)
+                            self._count('wait_seconds', retry_delay)
+                            time.sleep(retry_delay)
+                finally:
+                    self._count('in_flight', -1)
+        finally:
+            if queued:
+                self._count('queued', -1)
+
+    def reserve(self, estimated_tokens=0):
+        """为一次调度之外的额外请求（故障切换、对冲请求）预占配额，必要时阻塞等待
+
+        额外请求与所属的调度请求共用并发名额，不再另外占用。
+        """
+        delay = self._reserve(estimated_tokens)
+        if delay > 0:
+            self._count('wait_seconds', delay)
+            time.sleep(delay)
+        self._count('requests', 1)
+
+    def summary(self):
+        """返回调度统计的可读文本"""
+        with self._lock:
+            stats = dict(self.stats)
+        return (
+            f"大模型请求 {stats['requests']} 次（重试 {stats['retries']} 次，失败 {stats['failures']} 次），"
+            f"最大排队 {stats['max_queue_depth']}，累计等待 {stats['wait_seconds']:.1f} 秒"
+        )
+
+
+def get_llm_scheduler():
+    """获取全局大模型请求调度器"""
+    global _llm_scheduler
+    with _llm_scheduler_lock:
+        if _llm_scheduler is None:
+            _llm_scheduler = LLMScheduler()
+        return _llm_scheduler
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""本地仓库 / 镜像数据源
+
+不访问网络，直接从磁盘读取README和相对路径图片：
+- 本地路径：普通工作区目录或裸仓库（bare repository）
+- 镜像目录：MIRROR_DIR 下维护的 git 裸镜像，GitHub 地址会优先在这里查找，
+  支持 <owner>/<repo>.git、<owner>/<repo>、<repo>.git 三种布局
+
+相关环境变量：
+    MIRROR_DIR   git 镜像根目录，默认不启用
+"""
+
+import os
+import re
+import shutil
+import posixpath
+import subprocess
+import github_api
+import image_store
+import image_filter
+
+
+class DirectoryTree:
+    """普通目录（工作区）"""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.branch = None
+
+    def exists(self, path):
+        """判断文件是否存在"""
+        return os.path.isfile(os.path.join(self.root, *path.split('/')))
+
+    def read_text(self, path):
+        """读取文本文件"""
+        with open(os.path.join(self.root, *path.split('/')), 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    def copy_to(self, path, dest_path):
+        """复制文件到指定位置"""
+        shutil.copyfile(os.path.join(self.root, *path.split('/')), dest_path)
+
+
+class GitTree:
+    """git 裸仓库（读取 HEAD 指向的提交）"""
+
+    def __init__(self, git_dir, ref='HEAD'):
+        self.git_dir = os.path.abspath(git_dir)
+        self.ref = ref
+        self.branch = self._git('rev-parse', '--abbrev-ref', ref).decode('utf-8').strip() or None
+        self._files = None
+
+    def _git(self, *args):
+        """执行 git 命令并返回标准输出"""
+        return subprocess.run(
+            ['git', f'--git-dir={self.git_dir}', *args],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+        ).stdout
+
+    def exists(self, path):
+        """判断文件是否存在（首次调用时列出整棵树）"""
+        if self._files is None:
+            output = self._git('ls-tree', '-r', '--name-only', '-z', self.ref)
+            self._files = set(name for name in output.decode('utf-8', errors='replace').split('\0') if name)
+        return path in self._files
+
+    def read_text(self, path):
+        """读取文本文件"""
+        return self._git('cat-file', 'blob', f'{self.ref}:{path}').decode('utf-8', errors='replace')
+
+    def copy_to(self, path, dest_path):
+        """把文件内容流式写入指定位置"""
+        with open(dest_path, 'wb') as f:
+            subprocess.run(
+                ['git', f'--git-dir={self.git_dir}', 'cat-file', 'blob', f'{self.ref}:{path}'],
+                stdout=f, stderr=subprocess.PIPE, check=True
+            )
+
+
+def is_bare_repo(path):
+    """判断目录是否为 git 裸仓库"""
+    return all(os.path.exists(os.path.join(path, name)) for name in ('HEAD', 'objects', 'refs'))
+
+
+def open_tree(path):
+    """根据目录类型创建读取器"""
+    return GitTree(path) if is_bare_repo(path) else DirectoryTree(path)
+
+
+def is_local_source(url):
+    """判断项目地址是否为本地路径"""
+    if url.startswith('file://'):
+        return True
+    return '://' not in url and os.path.isdir(os.path.expanduser(url))
+
+
+def find_mirror(url, mirror_dir=None):
+    """在镜像目录中查找 GitHub 仓库的镜像
+
+    Returns:
+        str: 镜像路径，未配置或不存在时返回 None
+    """
+    mirror_dir = mirror_dir or os.getenv('MIRROR_DIR', '')
+    repo = github_api.parse_repo_url(url)
+    if not mirror_dir or not repo:
+        return None
+    owner, name = repo.split('/')
+    for candidate in (
+        os.path.join(mirror_dir, owner, f'{name}.git'),
+        os.path.join(mirror_dir, owner, name),
+        os.path.join(mirror_dir, f'{name}.git'),
+    ):
+        if os.path.isdir(candidate):
+            return candidate
+    return None
+
+
+def read_source(path):
+    """从本地目录或裸仓库读取README和引用的图片
+
+    Args:
+        path (str): 本地目录、裸仓库或 file:// 地址
+
+    Returns:
+        dict: {'content', 'branch', 'path', 'images'}，未找到README时返回 None
+    """
+    if path.startswith('file://'):
+        path = path[len('file://'):]
+    tree = open_tree(os.path.expanduser(path))
+
+    readme_path = next((name for name in github_api.README_FILENAMES if tree.exists(name)), None)
+    if not readme_path:
+        return None
+    content = tree.read_text(readme_path)
+    print(f"成功从本地读取文件：{os.path.join(path, readme_path)}")
+
+    store = image_store.get_image_store()
+    readme_dir = posixpath.dirname(readme_path)
+    images = {}
+    for _, img_url in re.findall(r'!\[([^\]]*)\]\(([^)]+)\)', content):
+        file_path = github_api.resolve_repo_path(readme_dir, img_url)
+        if not file_path or img_url in images or not tree.exists(file_path):
+            continue
+        if image_filter.get_image_filter().should_skip(file_path):
+            continue
+        tmp_path = store.temp_path()
+        try:
+            tree.copy_to(file_path, tmp_path)
+            source_key = f"file://{os.path.abspath(path)}/{file_path}"
+            images[img_url] = store.put_file(source_key, tmp_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"读取本地图片失败 {file_path}: {str(e)}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    return {
+        'content': content,
+        'branch': tree.branch,
+        'path': readme_path,
+        'images': images
+    }
@@ -1,5 +1,22 @@
 import os
-import requests
+import http_client
+import http_cache
+import image_downloader
+import image_store
+import image_filter
+import archive_fetcher
+import local_source
+import state_store
+import dedup_index
+import llm_cache
+import section_stream
+import readme_chunker
+import readme_compactor
+import llm_scheduler
+import llm_providers
+import llm_ledger
+import text_normalizer
+import article_schema
 from bs4 import BeautifulSoup
 import openai
 from jinja2 import Template, FileSystemLoader, Environment
@@ -10,10 +27,17 @@ from datetime import datetime
 import random
 from poster_generator import PosterGenerator
 from weixin_publisher import WeixinPublisher
+import github_api
 import sys
 import argparse
 import traceback
 import re
+import time
+import threading
+import contextvars
+import hashlib
+import collections
+from concurrent.futures import ThreadPoolExecutor, as_completed
 # 导入publish_to_weixin模块
 import publish_to_weixin
 
@@ -24,40 +48,48 @@ load_dotenv()
 openai.api_base = os.getenv('OPENAI_API_BASE', '')
 openai.api_key = os.getenv('OPENAI_API_KEY', '')
 
-def fetch_readme_content(url):
-    """获取README内容和相关图片"""
+# 分析参数（修改提示词模板时递增版本号，使旧的缓存结果失效）
+PROMPT_TEMPLATE_VERSION = '2'
+ANALYSIS_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o')  # 默认服务的模型，LLM_PROVIDERS 可配置多个服务
+ANALYSIS_MAX_TOKENS = 3000
+CHUNK_PROMPT_VERSION = '2'
+
+# 章节标题与模板字段的对应关系
+SECTION_KEYS = {
+    '前言': 'preface',
+    '项目介绍': 'introduction',
+    '功能亮点': 'features',
+    '技术特点': 'technical',
+    '安装说明': 'installation',
+    '使用说明': 'usage',
+    '项目地址': 'repository',
+    '结语': 'conclusion'
+}
+
+def fetch_readme_content(url, mode=None, prefetched=None):
+    """获取README内容和相关图片
+    
+    Args:
+        url (str): 项目地址，可以是GitHub地址、raw地址、本地目录或裸仓库
+        mode (str): 获取方式，api（默认）或 archive，默认读取 README_FETCH_MODE
+        prefetched (dict): 已批量获取的README（见 github_api.fetch_readmes_batch），跳过逐个查找
+    """
+    if mode is None:
+        mode = os.getenv('README_FETCH_MODE', 'api').lower()
+    
+    # 本地目录或裸仓库：直接从磁盘读取，不访问网络
+    if local_source.is_local_source(url):
+        local = local_source.read_source(url)
+        if not local:
+            raise Exception(f"无法在本地目录中找到README文件：{url}")
+        return localize_images(local['content'], None, local['images'], download_remote=False)
+    
     def try_get_content(url):
         """尝试获取内容"""
         print(f"尝试获取内容：{url}")
-        response = requests.get(url)
+        response = http_cache.cached_get(url)
         return response.status_code == 200, response.text if response.status_code == 200 else None
 
-    def download_image(img_url, repo_base):
-        """下载图片并保存到本地"""
-        try:
-            # 确保images目录存在
-            os.makedirs('images', exist_ok=True)
-            
-            # 获取图片文件名
-            img_filename = os.path.basename(img_url)
-            if '?' in img_filename:
-                img_filename = img_filename.split('?')[0]
-            
-            # 如果是相对路径，转换为完整URL
-            if not img_url.startswith(('http://', 'https://')):
-                img_url = f"{repo_base}/{img_url}"
-            
-            # 下载图片
-            response = requests.get(img_url)
-            if response.status_code == 200:
-                local_path = os.path.join('images', img_filename)
-                with open(local_path, 'wb') as f:
-                    f.write(response.content)
-                return local_path
-        except Exception as e:
-            print(f"下载图片失败 {img_url}: {str(e)}")
-        return None
-
     # 如果是GitHub仓库URL
     if 'github.com' in url:
         # 检查是否是具体的文件路径
@@ -84,48 +116,69 @@ def fetch_readme_content(url):
         raw_base = url.replace('github.com', 'raw.githubusercontent.com')
         repo_base = raw_base
         
-        # 尝试不同分支和文件名的组合
-        branches = ['main', 'master', 'dev', 'develop', 'variable']  # 添加更多常用分支
-        filenames = [
-            'README.md', 'README', 'readme.md', 'Readme.md',
-            'README_CN.md', 'README.zh-CN.md', 'README_zh.md',  # 添加中文README文件名
-            'docs/README.md', 'doc/README.md',  # 添加可能的文档目录
-            'docs/zh/README.md', 'docs/cn/README.md'  # 添加可能的中文文档目录
-        ]
-        
-        # 首先尝试直接访问仓库API获取默认分支和所有分支
-        api_url = url.replace('github.com', 'api.github.com/repos')
-        try:
-            repo_info = requests.get(api_url).json()
-            if 'default_branch' in repo_info:
-                branches.insert(0, repo_info['default_branch'])
-            
-            # 获取所有分支
-            branches_url = f"{api_url}/branches"
-            branches_info = requests.get(branches_url).json()
-            if isinstance(branches_info, list):
-                additional_branches = [b['name'] for b in branches_info if b['name'] not in branches]
-                branches.extend(additional_branches)
-        except:
-            pass
-
+        # 优先使用本地镜像
+        mirror_path = local_source.find_mirror(url)
+        if mirror_path:
+            try:
+                mirrored = local_source.read_source(mirror_path)
+                if mirrored:
+                    return localize_images(mirrored['content'], None, mirrored['images'], download_remote=False)
+            except Exception as e:
+                print(f"读取本地镜像失败，改用网络获取: {str(e)}")
+        
+        # 归档模式：下载一次分支归档，从中读取README和相对路径图片
+        if mode == 'archive':
+            try:
+                archived = archive_fetcher.fetch_from_archive(url)
+                if archived:
+                    repo_base = f"{raw_base}/{archived['branch']}"
+                    if '/' in archived['path']:
+                        repo_base = f"{repo_base}/{os.path.dirname(archived['path'])}"
+                    return localize_images(archived['content'], repo_base, archived['images'])
+            except Exception as e:
+                print(f"归档模式获取失败，改用逐个请求: {str(e)}")
+        
         content = None
         found_branch = None
         found_filename = None
         
-        # 尝试所有可能的组合
-        for branch in branches:
-            for filename in filenames:
-                raw_url = f"{raw_base}/{branch}/{filename}"
-                success, content_try = try_get_content(raw_url)
-                if success:
-                    print(f"成功找到文件：{raw_url}")
-                    content = content_try
-                    found_branch = branch
-                    found_filename = filename
-                    break
+        # 已通过GraphQL批量获取
+        if prefetched:
+            content = prefetched['content']
+            found_branch = prefetched['branch']
+            found_filename = prefetched['path']
+        
+        # 首先通过 /readme 接口直接定位默认分支和README路径（结果带缓存）
+        location = None if content else github_api.get_readme_location(url)
+        if location:
+            raw_url = f"{raw_base}/{location['branch']}/{location['path']}"
+            success, content_try = try_get_content(raw_url)
+            if success and content_try:
+                print(f"成功找到文件：{raw_url}")
+                content = content_try
+                found_branch = location['branch']
+                found_filename = location['path']
+        
+        if not content:
+            # 尝试不同分支和文件名的组合
+            branches = ['main', 'master', 'dev', 'develop', 'variable']  # 添加更多常用分支
+            filenames = github_api.README_FILENAMES
+            
+            # 获取默认分支和所有分支（结果带缓存）
+            repo_info = github_api.get_repo_info(url)
+            if repo_info.get('default_branch'):
+                branches.insert(0, repo_info['default_branch'])
+            branches.extend(github_api.get_repo_branches(url))
+            
+            # 去除重复分支，保持优先级顺序
+            branches = list(dict.fromkeys(branches))
+            
+            # 并发尝试所有可能的组合
+            found_branch, found_filename, content = probe_readme_candidates(
+                raw_base, branches, filenames, try_get_content
+            )
             if content:
-                break
+                github_api.remember_readme_location(url, found_branch, found_filename)
         
         if not content:
             raise Exception(f"无法在仓库中找到README文件：{url}")
@@ -137,22 +190,7 @@ def fetch_readme_content(url):
             subdir = os.path.dirname(found_filename)
             repo_base = f"{repo_base}/{subdir}"
             
-        # 查找Markdown格式的图片链接
-        img_links = []
-        lines = content.split('\n')
-        for i, line in enumerate(lines):
-            # 匹配Markdown图片语法
-            img_matches = re.findall(r'!\[([^\]]*)\]\(([^)]+)\)', line)
-            for alt_text, img_url in img_matches:
-                local_path = download_image(img_url, repo_base)
-                if local_path:
-                    # 替换为本地路径
-                    lines[i] = line.replace(img_url, local_path)
-                    img_links.append((alt_text, local_path))
-        
-        # 更新内容
-        content = '\n'.join(lines)
-        return content, img_links
+        return localize_images(content, repo_base)
     
     # 如果已经是raw内容URL
     success, content = try_get_content(url)
@@ -166,27 +204,284 @@ def fetch_readme_content(url):
     
     raise Exception(f"无法获取内容：{url}")
 
-def analyze_with_openai(content):
-    """使用OpenAI分析内容"""
-    # 限制输入内容长度
-    max_content_length = 4000  # 设置最大内容长度
-    if len(content) > max_content_length:
-        content = content[:max_content_length] + "\n...(内容已截断)"
+def resolve_image_url(img_url, repo_base):
+    """将图片地址转换为完整URL"""
+    # 如果是相对路径，转换为完整URL
+    if repo_base and not img_url.startswith(('http://', 'https://')):
+        return f"{repo_base}/{img_url}"
+    return img_url
+
+def localize_images(content, repo_base, local_images=None, download_remote=True):
+    """下载README中的图片并把链接替换为本地路径
+    
+    Args:
+        content (str): README内容
+        repo_base (str): 相对路径图片的基础URL
+        local_images (dict): 已在本地的图片，原链接 -> 本地路径
+        download_remote (bool): 是否下载不在本地的图片，离线数据源为 False
+        
+    Returns:
+        tuple: (替换后的内容, [(alt_text, local_path), ...])
+    """
+    local_images = local_images or {}
+    
+    # 查找Markdown格式的图片链接
+    lines = content.split('\n')
+    img_matches = []
+    for i, line in enumerate(lines):
+        # 匹配Markdown图片语法
+        for alt_text, img_url in re.findall(r'!\[([^\]]*)\]\(([^)]+)\)', line):
+            img_matches.append((i, alt_text, img_url, resolve_image_url(img_url, repo_base)))
+    
+    # 并发下载其余图片（相同URL只下载一次），徽章、跟踪像素和SVG不下载
+    downloaded = {}
+    if download_remote:
+        filt = image_filter.get_image_filter()
+        downloaded = image_downloader.get_image_downloader().download_all([
+            full_url for _, _, img_url, full_url in img_matches
+            if img_url not in local_images and not filt.should_skip(full_url)
+        ])
+    
+    img_links = []
+    for i, alt_text, img_url, full_url in img_matches:
+        local_path = local_images.get(img_url) or downloaded.get(full_url)
+        if local_path:
+            # 替换为本地路径
+            lines[i] = lines[i].replace(f"]({img_url})", f"]({local_path})")
+            img_links.append((alt_text, local_path))
     
-    prompt = f"""请仔细分析以下GitHub项目的README内容，生成一篇详细的介绍文章。要求：
+    # 更新内容
+    content = '\n'.join(lines)
+    return content, img_links
 
-1. 文章结构要求：
-   - 标题：简洁有力，不超过20个字
-   - 前言：概括项目的核心价值和主要用途
-   - 项目介绍：详细说明项目的背景、目标和解决的问题
-   - 功能亮点：列举项目的主要功能，每个功能都要详细说明
-   - 技术特点：分析项目的技术架构、性能优势等
-   - 安装说明：完整的安装步骤，包括环境要求
-   - 使用说明：详细的使用方法，包括配置说明
-   - 项目地址：项目的源码地址
-   - 结语：总结项目价值，展望未来发展
-
-2. 内容要求：
+def probe_readme_candidates(raw_base, branches, filenames, fetch, max_workers=None):
+    """并发探测README候选地址，按优先级返回命中的结果
+    
+    候选地址按 分支 × 文件名 的顺序排列，优先级与原先的顺序尝试一致。
+    只有当排在前面的候选全部确认不存在时，才采用后面的命中结果；
+    一旦确定最高优先级的命中，立即取消尚未开始的探测。
+    
+    Args:
+        raw_base (str): raw.githubusercontent.com 上的仓库地址
+        branches (list): 按优先级排列的分支列表
+        filenames (list): 按优先级排列的文件名列表
+        fetch (callable): 获取内容的函数，返回 (success, content)
+        max_workers (int): 并发数，默认读取环境变量 README_PROBE_WORKERS
+        
+    Returns:
+        tuple: (branch, filename, content)，未找到时均为 None
+    """
+    if max_workers is None:
+        max_workers = int(os.getenv('README_PROBE_WORKERS', '8'))
+    
+    candidates = [(branch, filename) for branch in branches for filename in filenames]
+    if not candidates:
+        return None, None, None
+    
+    # None 表示尚未返回，False 表示未命中，其余为文件内容
+    results = [None] * len(candidates)
+    stop_event = threading.Event()
+    
+    def probe(index):
+        """探测单个候选地址"""
+        if stop_event.is_set():
+            return index, None
+        branch, filename = candidates[index]
+        try:
+            success, content = fetch(f"{raw_base}/{branch}/{filename}")
+        except Exception as e:
+            print(f"探测失败 {branch}/{filename}: {str(e)}")
+            success, content = False, None
+        return index, content if success and content else False
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    futures = [executor.submit(probe, index) for index in range(len(candidates))]
+    found_index = None
+    next_index = 0
+    try:
+        for future in as_completed(futures):
+            index, content = future.result()
+            results[index] = content
+            # 按优先级推进，直到遇到尚未返回的候选
+            while next_index < len(candidates) and results[next_index] is not None:
+                if results[next_index] is not False:
+                    found_index = next_index
+                    break
+                next_index += 1
+            if found_index is not None or next_index >= len(candidates):
+                break
+    finally:
+        # 取消剩余的探测
+        stop_event.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+    
+    if found_index is None:
+        return None, None, None
+    
+    branch, filename = candidates[found_index]
+    print(f"成功找到文件：{raw_base}/{branch}/{filename}")
+    return branch, filename, results[found_index]
+
+def get_analysis_model():
+    """优先级最高的大模型服务所用的模型（用于缓存键）"""
+    return llm_providers.get_provider_pool(ANALYSIS_MODEL).primary.model
+
+def prompt_prefix_id(messages):
+    """提示词静态前缀（system 消息）的标识：版本号加内容哈希的前8位"""
+    system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+    return f"v{PROMPT_TEMPLATE_VERSION}-{hashlib.sha256(system.encode('utf-8')).hexdigest()[:8]}"
+
+def chat_completion(messages, max_tokens=ANALYSIS_MAX_TOKENS, consume=None, **kwargs):
+    """调用大模型，经调度器按RPM/TPM配额限速，遇到限流或临时错误时重试
+    
+    传入 consume 时在调度名额内调用 consume(响应) 并返回其结果（流式响应需要在名额内读完）。
+    
+    请求按 LLM_PROVIDERS 的顺序发往健康的服务，失败时切换，启用 LLM_HEDGE_DELAY 时对慢请求做对冲；
+    故障切换和对冲发出的额外请求同样预占调度配额并记账。
+    超过 LLM_RUN_BUDGET / LLM_DAILY_BUDGET 等预算时抛出 llm_ledger.BudgetExceeded，不再发起请求。
+    """
+    ledger = llm_ledger.get_ledger()
+    ledger.check_budget()
+    estimated_tokens = sum(readme_compactor.estimate_tokens(m['content']) for m in messages) + max_tokens
+    pool = llm_providers.get_provider_pool(ANALYSIS_MODEL)
+    scheduler = llm_scheduler.get_llm_scheduler()
+    prefix = prompt_prefix_id(messages)
+    # 落败的对冲请求在其他线程中完成，记账时需要恢复当前文章
+    context = contextvars.copy_context()
+    
+    def record_discarded(response, latency):
+        context.run(ledger.record_response, response, pool.primary.model, latency, prefix=prefix)
+    
+    def request():
+        started = time.time()
+        response = pool.complete(
+            messages, max_tokens,
+            before_extra=lambda: scheduler.reserve(estimated_tokens),
+            on_discarded=record_discarded,
+            **kwargs
+        )
+        if consume:
+            return consume(response)
+        if not kwargs.get('stream'):
+            ledger.record_response(response, pool.primary.model, time.time() - started, prefix=prefix)
+        return response
+    
+    return scheduler.call(request, estimated_tokens)
+
+def stream_chat_completion(messages, on_text, max_tokens=ANALYSIS_MAX_TOKENS):
+    """以流式方式调用大模型，每收到一段文本就调用 on_text(文本)
+    
+    整个流在调度器的并发名额内读完，LLM_MAX_CONCURRENCY 同样限制流式请求；
+    已收到部分输出后中断时不再重试，避免重复输出。
+    流式响应没有用量信息，token数按文本估算记账。
+    
+    Returns:
+        str: 完整的输出文本
+    """
+    started = time.time()
+    received = []
+    
+    def consume(response):
+        try:
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.get('content')
+                if text:
+                    received.append(text)
+                    on_text(text)
+        except Exception as e:
+            if received:
+                raise RuntimeError(f"流式输出中断: {str(e)}") from e
+            raise
+        return ''.join(received)
+    
+    result = chat_completion(messages, max_tokens=max_tokens, stream=True, consume=consume)
+    llm_ledger.get_ledger().record(
+        get_analysis_model(),
+        sum(readme_compactor.estimate_tokens(m['content']) for m in messages),
+        readme_compactor.estimate_tokens(result),
+        time.time() - started,
+        prefix=prompt_prefix_id(messages),
+        estimated=True
+    )
+    return result
+
+def get_chunk_summary_tokens(total):
+    """每块要点的最大输出token数：不超过 LLM_CHUNK_SUMMARY_TOKENS，且所有分块合计不超过 LLM_MAP_REDUCE_MAX_TOKENS"""
+    max_tokens = int(os.getenv('LLM_CHUNK_SUMMARY_TOKENS', '800'))
+    budget = int(os.getenv('LLM_MAP_REDUCE_MAX_TOKENS', '6000'))
+    return max(100, min(max_tokens, budget // max(1, total)))
+
+def summarize_chunk(chunk, index, total, refresh=False):
+    """提取README中一个分块的要点（分块分析的 map 阶段）"""
+    max_tokens = get_chunk_summary_tokens(total)
+    cache = llm_cache.get_llm_cache() if llm_cache.is_enabled() else None
+    cache_key = llm_cache.make_key(chunk, f"chunk-{CHUNK_PROMPT_VERSION}", get_analysis_model(), max_tokens)
+    if cache and not (refresh or llm_cache.should_refresh()):
+        cached = cache.get(cache_key)
+        if cached:
+            return cached
+    
+    response = chat_completion(
+        [
+            {"role": "system", "content": CHUNK_PREFIX},
+            {"role": "user", "content": f"以下是README的第 {index + 1}/{total} 部分：\n\n{chunk}"}
+        ],
+        max_tokens=max_tokens
+    )
+    result = response.choices[0].message.content
+    if cache and result:
+        cache.set(cache_key, result)
+    return result
+
+def summarize_long_content(content, refresh=False):
+    """按标题分块并发提取要点，返回合并后的要点（分块分析的 map 阶段）"""
+    chunk_size = int(os.getenv('LLM_CHUNK_CHARS', '4000'))
+    max_workers = int(os.getenv('LLM_CHUNK_WORKERS', '4'))
+    chunks = readme_chunker.split_into_chunks(content, chunk_size)
+    print(f"README较长（{len(content)} 字符），分为 {len(chunks)} 块并发提取要点")
+    
+    summaries = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(contextvars.copy_context().run, summarize_chunk, chunk, index, len(chunks), refresh): index
+            for index, chunk in enumerate(chunks)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                summaries[index] = future.result()
+            except Exception as e:
+                # 单个分块失败时退回使用截断后的原文
+                print(f"提取第 {index + 1} 块要点失败: {str(e)}")
+                summaries[index] = chunks[index][:chunk_size // 4]
+    combined = "\n\n".join(summaries)
+    
+    # 分块很多时每块至少保留100个token，合并后仍可能超出上限，按比例截断到 LLM_MAP_REDUCE_MAX_TOKENS
+    budget = int(os.getenv('LLM_MAP_REDUCE_MAX_TOKENS', '6000'))
+    tokens = readme_compactor.estimate_tokens(combined)
+    if tokens > budget:
+        print(f"合并后的要点约 {tokens} tokens，截断到 {budget} tokens")
+        combined = combined[:len(combined) * budget // tokens] + "\n...(要点已截断)"
+    return "（以下是README各部分的要点，按原文顺序排列）\n\n" + combined
+
+# 文章结构：(章节名, 写作要求)，顺序即 generate_html 期望的章节顺序
+ARTICLE_STRUCTURE = [
+    ('标题', '简洁有力，不超过20个字'),
+    ('前言', '概括项目的核心价值和主要用途'),
+    ('项目介绍', '详细说明项目的背景、目标和解决的问题'),
+    ('功能亮点', '列举项目的主要功能，每个功能都要详细说明'),
+    ('技术特点', '分析项目的技术架构、性能优势等'),
+    ('安装说明', '完整的安装步骤，包括环境要求'),
+    ('使用说明', '详细的使用方法，包括配置说明'),
+    ('项目地址', '项目的源码地址'),
+    ('结语', '总结项目价值，展望未来发展')
+]
+
+ANALYSIS_CONTENT_REQUIREMENTS = """2. 内容要求：
    - 直接引用README中的重要内容，保持原始信息的准确性
    - 对于代码示例和配置，保持原格式，不要简化
    - 保留原文中的所有图片引用
@@ -198,52 +493,297 @@ def analyze_with_openai(content):
    - 图片使用原始Markdown格式
    - 重要内容使用加粗标记
    - 项目地址直接使用URL，不要加修饰
-   - 列表项使用 - 标记
+   - 列表项使用 - 标记"""
 
-请基于以上要求，分析并生成文章：
+ANALYSIS_SYSTEM_PROMPT = "你是一个专业的技术文档作者，擅长分析开源项目并生成详细的介绍文章。你会保持原始文档的准确性，同时让内容更加结构化和易于理解。"
 
-{content}"""
+# 提示词布局：固定不变的指令全部放在最前面（system 消息），README等可变内容放在后面的 user 消息中。
+# 前缀在进程内和多次运行之间逐字节一致，批量运行时可以命中服务端的提示词缓存。
+# 修改以下任何前缀时递增 PROMPT_TEMPLATE_VERSION / CHUNK_PROMPT_VERSION。
 
-    response = openai.ChatCompletion.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": "你是一个专业的技术文档作者，擅长分析开源项目并生成详细的介绍文章。你会保持原始文档的准确性，同时让内容更加结构化和易于理解。"},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=3000
-    )
+def _structure_lines(template):
+    return '\n'.join(template.format(name=name, requirement=requirement) for name, requirement in ARTICLE_STRUCTURE)
+
+def _json_field_lines():
+    fields = []
+    for name, requirement in ARTICLE_STRUCTURE:
+        if name == '标题':
+            fields.append(f"   - title：{name}，{requirement}")
+            fields.append("   - subtitle：副标题，一句话概括项目的定位")
+            fields.append("   - digest：摘要，不超过50个字，用于文章列表展示")
+        else:
+            fields.append(f"   - {SECTION_KEYS[name]}：{name}，{requirement}")
+    return '\n'.join(fields)
+
+ANALYSIS_PREFIX = f"""{ANALYSIS_SYSTEM_PROMPT}
+
+请仔细分析用户提供的GitHub项目README内容，生成一篇详细的介绍文章。要求：
+
+1. 文章结构要求：
+{_structure_lines("   - {name}：{requirement}")}
+
+{ANALYSIS_CONTENT_REQUIREMENTS}"""
+
+JSON_PREFIX = f"""{ANALYSIS_SYSTEM_PROMPT}
+
+请仔细分析用户提供的GitHub项目README内容，生成一篇详细的介绍文章，以JSON对象输出。要求：
+
+1. JSON字段（全部为字符串，章节内容使用Markdown，不要包含章节标题）：
+{_json_field_lines()}
+
+{ANALYSIS_CONTENT_REQUIREMENTS}
+
+4. 只输出一个JSON对象，不要用代码块包裹，也不要输出其他内容"""
+
+SECTION_PREFIX = f"""{ANALYSIS_SYSTEM_PROMPT}
+
+请仔细分析用户提供的GitHub项目README内容，为一篇详细的介绍文章撰写用户指定的章节。要求：
+
+1. 只撰写指定的章节，不要输出其他章节，也不要添加开场白；标题使用 # 标题 的格式，章节以 ## 章节名 开头
+
+{ANALYSIS_CONTENT_REQUIREMENTS}"""
+
+CHUNK_PREFIX = """你是一个专业的技术文档作者，擅长准确地提炼开源项目文档的要点。
+
+用户会提供GitHub项目README的其中一部分。请提取其中的要点，供后续撰写项目介绍文章使用。要求：
+- 保留标题层级、版本信息、依赖要求和图片引用（原始Markdown格式）
+- 安装命令、配置和代码示例保持原格式，过长的只保留关键部分
+- 只输出要点，不要添加开场白或总结"""
+
+def readme_message(content):
+    """README内容消息（可变部分）"""
+    return {"role": "user", "content": f"以下是GitHub项目的README内容：\n\n{content}"}
+
+def build_analysis_messages(content):
+    """构建完整文章的消息"""
+    return [{"role": "system", "content": ANALYSIS_PREFIX}, readme_message(content)]
+
+def build_json_messages(content):
+    """构建结构化（JSON）输出的消息"""
+    return [{"role": "system", "content": JSON_PREFIX}, readme_message(content)]
+
+def build_section_messages(content, group):
+    """构建只生成部分章节的消息：各分组共享 system 前缀和README消息，只有最后的章节说明不同"""
+    requirements = dict(ARTICLE_STRUCTURE)
+    lines = []
+    for name in group:
+        if name == '标题':
+            lines.append(f"   - 标题：{requirements[name]}，第一行使用 # 标题 的格式输出")
+        else:
+            lines.append(f"   - {name}：{requirements[name]}，以 ## {name} 开头")
+    structure = '\n'.join(lines)
+    return [
+        {"role": "system", "content": SECTION_PREFIX},
+        readme_message(content),
+        {"role": "user", "content": f"请只撰写以下章节：\n{structure}"}
+    ]
+
+# 并发生成时的默认章节分组
+DEFAULT_SECTION_GROUPS = [
+    ['标题', '前言'],
+    ['项目介绍'],
+    ['功能亮点'],
+    ['技术特点'],
+    ['安装说明'],
+    ['使用说明'],
+    ['项目地址', '结语']
+]
+
+def generate_structured_article(content):
+    """以JSON模式生成文章，校验字段，缺失或为空的字段要求模型补全
     
-    # 获取响应内容
-    result = response.choices[0].message.content
+    Returns:
+        str: 规范化后的文章JSON
     
-    # 确保结果是正确的中文编码
-    try:
-        # 1. 如果是 bytes，先解码为 utf-8
-        if isinstance(result, bytes):
-            result = result.decode('utf-8')
-            
-        # 2. 处理 Unicode 转义序列
-        while '\\u' in result:
-            result = result.encode().decode('unicode-escape')
-            
-        # 3. 确保是 utf-8 字符串
-        result = result.encode('utf-8').decode('utf-8')
-    except Exception as e:
-        print(f"编码处理失败: {str(e)}")
-        # 如果处理失败，尝试直接使用 unicode-escape 解码
-        try:
-            result = result.encode('utf-8').decode('unicode-escape')
-        except:
-            # 如果还是失败，保持原始内容
-            pass
+    Raises:
+        ValueError: 补全 LLM_JSON_MAX_REPAIRS 次后仍有字段缺失
+    """
+    messages = build_json_messages(content)
+    max_repairs = max(0, int(os.getenv('LLM_JSON_MAX_REPAIRS', '1')))
+    article = None
+    for attempt in range(max_repairs + 1):
+        response = chat_completion(messages, response_format={"type": "json_object"})
+        raw = response.choices[0].message.content or ''
+        parsed = article_schema.parse_article(raw)
+        if parsed is not None:
+            # 保留已有的有效字段，补全时只需要模型输出缺失的部分
+            article = dict(article or {}, **{k: v for k, v in parsed.items() if isinstance(v, str) and v.strip()})
+        missing = article_schema.validate(article)
+        if not missing:
+            break
+        print(f"结构化输出缺少字段：{', '.join(missing)}")
+        if attempt < max_repairs:
+            messages = messages + [
+                {"role": "assistant", "content": raw},
+                {"role": "user", "content": f"以下字段缺失、不是字符串或内容为空：{', '.join(missing)}。请补全这些字段，重新输出完整的JSON对象。"}
+            ]
+    if missing:
+        # 不返回不完整的文章，避免被缓存或发布
+        raise ValueError(f"结构化输出在 {max_repairs} 次补全后仍缺少字段：{', '.join(missing)}")
+    return article_schema.dumps(article_schema.normalize(article))
+
+def get_section_groups():
+    """读取并发生成的章节分组（LLM_SECTION_GROUPS，分组之间用逗号、组内章节用 + 分隔）"""
+    groups_env = os.getenv('LLM_SECTION_GROUPS', '')
+    if not groups_env.strip():
+        return DEFAULT_SECTION_GROUPS
+    known = dict(ARTICLE_STRUCTURE)
+    groups = []
+    for group in groups_env.split(','):
+        names = [name.strip() for name in group.split('+') if name.strip() in known]
+        if names:
+            groups.append(names)
+    return groups or DEFAULT_SECTION_GROUPS
+
+def generate_sections_in_parallel(content):
+    """按章节分组并发请求，按文章结构顺序拼接为完整文章
+    
+    输出token是主要的耗时来源，分组并发生成可以成倍缩短总耗时。
+    任一分组失败时（包括超过预算）在所有分组结束后抛出该异常，不返回缺章节的文章。
+    """
+    groups = get_section_groups()
+    max_tokens = int(os.getenv('LLM_SECTION_MAX_TOKENS', '1000'))
+    max_workers = int(os.getenv('LLM_SECTION_WORKERS') or len(groups))
+    print(f"按 {len(groups)} 组章节并发生成文章")
+    
+    def generate(group):
+        response = chat_completion(build_section_messages(content, group), max_tokens=max_tokens)
+        return response.choices[0].message.content or ''
+    
+    title = ''
+    bodies = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(contextvars.copy_context().run, generate, group): group for group in groups}
+        for future in as_completed(futures):
+            group = futures[future]
+            try:
+                text = future.result()
+            except Exception as e:
+                print(f"生成章节 {'、'.join(group)} 失败: {str(e)}")
+                errors.append(e)
+                continue
+            parsed = section_stream.SectionStream()
+            parsed.feed(text)
+            parsed.close()
+            if '标题' in group and parsed.title:
+                title = parsed.title
+            sections = dict(parsed.sections)
+            names = [name for name in group if name != '标题']
+            if len(names) == 1 and names[0] not in sections:
+                # 模型没有输出章节标题时，整段作为该章节内容
+                body = '\n'.join(line for line in text.split('\n') if not line.startswith('#')).strip()
+                if body:
+                    sections[names[0]] = body
+            for name in names:
+                if name in sections:
+                    bodies[name] = sections[name].strip('\n')
+    
+    # 任一分组失败时整体失败，避免缺章节的文章被缓存或写入状态
+    if errors:
+        raise errors[0]
+    
+    parts = [f"# {title}"] if title else []
+    for name, _ in ARTICLE_STRUCTURE:
+        if name in bodies:
+            parts.append(f"## {name}\n{bodies[name]}")
+    return '\n\n'.join(parts)
+
+def analyze_with_openai(content, refresh=False, on_section=None):
+    """使用OpenAI分析内容
+
+    相同输入（内容哈希、提示词版本、模型、max_tokens 均一致）的结果会被缓存，
+    refresh 为 True 或设置 LLM_CACHE_REFRESH=true 时忽略缓存重新请求。
+    传入 on_section 时使用流式输出，每生成完一个章节就调用 on_section(章节标题, 章节内容, 解析器)。
+    超过长度上限的内容在启用 LLM_MAP_REDUCE 时先分块提取要点，再统一成文，否则直接截断。
+    LLM_SECTION_MODE=parallel 时按章节分组并发生成（见 generate_sections_in_parallel）。
+    LLM_OUTPUT_FORMAT=json 时返回结构化文章的JSON文本（见 generate_structured_article）。
+    """
+    # 去掉徽章、目录、许可证正文等无用内容，减少输入token
+    if readme_compactor.is_enabled():
+        tokens_before = readme_compactor.estimate_tokens(content)
+        content = readme_compactor.compact_readme(content)
+        tokens_after = readme_compactor.estimate_tokens(content)
+        print(f"README压缩：约 {tokens_before} → {tokens_after} tokens")
+    
+    # 限制输入内容长度
+    max_content_length = 4000  # 设置最大内容长度
+    map_reduce = len(content) > max_content_length and os.getenv('LLM_MAP_REDUCE', 'false').lower() == 'true'
+    if len(content) > max_content_length and not map_reduce:
+        content = content[:max_content_length] + "\n...(内容已截断)"
+
+    cache = llm_cache.get_llm_cache() if llm_cache.is_enabled() else None
+    cache_options = {}
+    if map_reduce:
+        cache_options = {
+            'mode': f"map_reduce-{CHUNK_PROMPT_VERSION}",
+            'chunk_chars': os.getenv('LLM_CHUNK_CHARS', '4000'),
+            'reduce_max_tokens': os.getenv('LLM_MAP_REDUCE_MAX_TOKENS', '6000')
+        }
+    structured = os.getenv('LLM_OUTPUT_FORMAT', 'markdown').lower() == 'json'
+    section_groups = None
+    if structured:
+        cache_options['format'] = 'json'
+        if on_section:
+            print("提示：LLM_OUTPUT_FORMAT=json 不支持流式输出，已忽略 --stream / LLM_STREAM")
+            on_section = None
+    elif os.getenv('LLM_SECTION_MODE', 'single').lower() == 'parallel':
+        section_groups = get_section_groups()
+    if section_groups:
+        cache_options['sections'] = '|'.join('+'.join(group) for group in section_groups)
+        cache_options['section_max_tokens'] = os.getenv('LLM_SECTION_MAX_TOKENS', '1000')
+    cache_key = llm_cache.make_key(content, PROMPT_TEMPLATE_VERSION, get_analysis_model(), ANALYSIS_MAX_TOKENS, **cache_options)
+    if cache and not (refresh or llm_cache.should_refresh()):
+        cached = cache.get(cache_key)
+        if cached:
+            print("命中大模型响应缓存，跳过OpenAI调用")
+            if on_section:
+                section_stream.replay(cached, on_section)
+            return cached
+    
+    if map_reduce:
+        content = summarize_long_content(content, refresh=refresh)
+    
+    messages = build_analysis_messages(content)
+    
+    if structured:
+        # 结构化输出：直接得到各章节内容，不再逐行解析Markdown（不支持流式）
+        result = generate_structured_article(content)
+    elif section_groups:
+        # 按章节分组并发生成，再按文章顺序拼接
+        result = generate_sections_in_parallel(content)
+        if on_section:
+            section_stream.replay(result, on_section)
+    elif on_section:
+        # 流式输出：边接收边切分章节
+        stream = section_stream.SectionStream(on_section)
+        stream_chat_completion(messages, stream.feed)
+        result = stream.close()
+    else:
+        response = chat_completion(messages)
+        
+        # 获取响应内容
+        result = response.choices[0].message.content
+    
+    # 还原转义序列、统一换行和Unicode形式（代码块中的内容保持原样；JSON已逐字段处理）
+    if not structured:
+        result = text_normalizer.normalize_text(result)
     
     print("\nOpenAI响应内容：")
     print(result)
     print("\n" + "="*50 + "\n")
+
+    if cache and result:
+        cache.set(cache_key, result)
     return result
 
-def generate_html(analysis_result):
-    """生成微信公众号文章HTML"""
+def generate_html(analysis_result, rendered_sections=None):
+    """生成微信公众号文章HTML
+    
+    Args:
+        analysis_result (str): 分析结果（Markdown）
+        rendered_sections (dict): 流式输出时已渲染好的章节，键为 (章节标题, 章节内容)，内容一致时直接复用
+    """
     try:
         if isinstance(analysis_result, bytes):
             analysis_result = analysis_result.decode('utf-8')
@@ -253,6 +793,17 @@ def generate_html(analysis_result):
         template_name = os.getenv('TEMPLATE_NAME', 'article')
         template = env.get_template(f'{template_name}.html')
         
+        # 结构化输出直接作为模板上下文
+        article = article_schema.parse_article(analysis_result)
+        if article is not None:
+            article = article_schema.normalize(article)
+            return template.render(
+                title=article['title'],
+                subtitle=article['subtitle'],
+                digest=article['digest'],
+                sections={field: process_section_content(article[field]) for field in article_schema.SECTION_FIELDS}
+            )
+        
         # 初始化sections字典
         sections = {
             'preface': '',
@@ -268,6 +819,13 @@ def generate_html(analysis_result):
         title = ''
         current_section = None
         current_content = []
+        rendered_sections = rendered_sections or {}
+        
+        def render_section(section_title, section_content):
+            key = SECTION_KEYS.get(section_title)
+            if key:
+                rendered = rendered_sections.get((section_title, section_content))
+                sections[key] = rendered if rendered is not None else process_section_content(section_content)
         
         # 解析文章内容
         for line in analysis_result.split('\n'):
@@ -277,23 +835,7 @@ def generate_html(analysis_result):
             elif line.startswith('## '):
                 # 如果有之前的section，保存它
                 if current_section and current_content:
-                    section_content = '\n'.join(current_content)
-                    if current_section == '前言':
-                        sections['preface'] = process_section_content(section_content)
-                    elif current_section == '项目介绍':
-                        sections['introduction'] = process_section_content(section_content)
-                    elif current_section == '功能亮点':
-                        sections['features'] = process_section_content(section_content)
-                    elif current_section == '技术特点':
-                        sections['technical'] = process_section_content(section_content)
-                    elif current_section == '安装说明':
-                        sections['installation'] = process_section_content(section_content)
-                    elif current_section == '使用说明':
-                        sections['usage'] = process_section_content(section_content)
-                    elif current_section == '项目地址':
-                        sections['repository'] = process_section_content(section_content)
-                    elif current_section == '结语':
-                        sections['conclusion'] = process_section_content(section_content)
+                    render_section(current_section, '\n'.join(current_content))
                 
                 # 新的section
                 current_section = line.replace('## ', '').strip()
@@ -303,10 +845,7 @@ def generate_html(analysis_result):
         
         # 处理最后一个section
         if current_section and current_content:
-            section_content = '\n'.join(current_content)
-            if current_section == '结语':
-                sections['conclusion'] = process_section_content(section_content)
-            # ... 其他section的处理 ...
+            render_section(current_section, '\n'.join(current_content))
         
         # 渲染模板
         html_content = template.render(
@@ -525,9 +1064,20 @@ def generate_image(prompt_text_zh, title, sub_title, body_text):
 
 def extract_article_content(analysis_result):
     """从文章内容中提取标题、副标题和正文"""
-    # 确保输入是UTF-8编码的字符串
-    if isinstance(analysis_result, bytes):
-        analysis_result = analysis_result.decode('utf-8')
+    # 结构化输出直接读取字段
+    article = article_schema.parse_article(analysis_result)
+    if article is not None:
+        article = article_schema.normalize(article)
+        title = article['title'] or "Open-Sora开源项目介绍"
+        body_text = article['digest'] or article['preface'].split('\n')[0]
+        return {
+            'title': title[:29] + "..." if len(title) > 30 else title,
+            'sub_title': article['subtitle'],
+            'body_text': body_text[:47] + "..." if len(body_text) > 50 else body_text
+        }
+    
+    # 确保输入是规范化的UTF-8字符串
+    analysis_result = text_normalizer.normalize_text(analysis_result)
     
     lines = analysis_result.split('\n')
     title = "Open-Sora开源项目介绍"  # 设置默认标题
@@ -539,15 +1089,9 @@ def extract_article_content(analysis_result):
         # 移除可能的空格
         line = line.strip()
         if line.startswith(('#', '###', '####')):
-            # 移除#号和空格，并确保编码正确
+            # 移除#号和空格
             clean_title = line.lstrip('#').strip()
             if clean_title:
-                # 处理可能的 Unicode 转义序列
-                if '\\u' in clean_title:
-                    try:
-                        clean_title = clean_title.encode().decode('unicode-escape')
-                    except Exception:
-                        pass
                 title = clean_title
                 break
     
@@ -555,12 +1099,6 @@ def extract_article_content(analysis_result):
     for line in lines:
         if line.startswith(('##', '###')):
             sub_title = line.lstrip('#').strip()
-            # 处理可能的 Unicode 转义序列
-            if '\\u' in sub_title:
-                try:
-                    sub_title = sub_title.encode().decode('unicode-escape')
-                except Exception:
-                    pass
             break
     
     # 提取正文（收集所有非标题、非代码块的文本）
@@ -578,12 +1116,6 @@ def extract_article_content(analysis_result):
             clean_line = re.sub(r'\*(.*?)\*', r'\1', clean_line)  # 移除斜体
             
             if clean_line.strip():
-                # 处理可能的 Unicode 转义序列
-                if '\\u' in clean_line:
-                    try:
-                        clean_line = clean_line.encode().decode('unicode-escape')
-                    except Exception:
-                        pass
                 body_text.append(clean_line.strip())
     
     # 获取第一段文本，并限制长度为50个字符
@@ -653,15 +1185,234 @@ def generate_poster(article_content):
             traceback.print_exc()
     return poster_url
 
+def get_article_output_file(key, batch):
+    """文章HTML的保存路径：合并模式为 output.html，逐仓库模式按仓库名保存到 output/ 目录
+    
+    GitHub地址使用 owner__repo；本地路径等其他来源使用目录名加完整路径哈希的前8位，避免同名目录互相覆盖。
+    """
+    if not batch:
+        return 'output.html'
+    name = github_api.parse_repo_url(key) if 'github.com' in key else None
+    if not name:
+        source = key[len('file://'):] if key.startswith('file://') else key
+        if local_source.is_local_source(key):
+            source = os.path.abspath(os.path.expanduser(source))
+        source = source.rstrip('/\\')
+        name = f"{os.path.basename(source) or 'article'}-{hashlib.sha256(source.encode('utf-8')).hexdigest()[:8]}"
+    name = re.sub(r'[^\w.-]+', '_', name.replace('/', '__'))
+    os.makedirs('output', exist_ok=True)
+    return os.path.join('output', f'{name}.html')
+
+def find_near_duplicate(key, content):
+    """在近似重复索引中查找与当前README相似的已有文章
+    
+    Returns:
+        tuple: (文章键, 相似度)，未启用或未找到时返回 (None, 0.0)
+    """
+    if os.getenv('DEDUP_ENABLED', 'true').lower() != 'true':
+        return None, 0.0
+    try:
+        return dedup_index.get_dedup_index().find_duplicate(content, exclude_key=key)
+    except Exception as e:
+        print(f"近似重复检测失败: {str(e)}")
+        return None, 0.0
+
+def add_to_dedup_index(key, content):
+    """把新生成文章的README加入近似重复索引"""
+    if os.getenv('DEDUP_ENABLED', 'true').lower() != 'true':
+        return
+    try:
+        dedup_index.get_dedup_index().add(key, content)
+    except Exception as e:
+        print(f"写入近似重复索引失败: {str(e)}")
+
+def process_article(key, readme_contents, args, should_publish, output_file):
+    """生成（并按需发布）一篇文章，README未变化时复用上次运行的产物
+    
+    Args:
+        key (str): 文章在状态存储中的键（仓库地址或合并后的地址列表）
+        readme_contents (list): README内容列表
+        args: 命令行参数
+        should_publish (bool): 是否发布到微信
+        output_file (str): HTML保存路径
+    """
+    state = state_store.get_state_store()
+    llm_ledger.current_article.set(key)
+    
+    # 合并所有内容
+    combined_content = "\n\n---\n\n".join(readme_contents)
+    readme_hash = state_store.content_hash(combined_content)
+    record = state.get(key)
+    unchanged = record.get('readme_hash') == readme_hash and not args.force
+    rendered_sections = {}
+    early_poster = {}
+    
+    try:
+        if unchanged and record.get('published') and (args.test or not record.get('published_test')):
+            print(f"\nREADME未变化且已发布，跳过：{key}")
+            return
+    
+        if unchanged and record.get('analysis'):
+            print(f"\nREADME未变化，复用上次的分析结果：{key}")
+            analysis_result = record['analysis']
+        else:
+            analysis_result = None
+        
+            # 近似重复的README（fork、镜像、模板仓库）复用已有文章或直接跳过；--force / --refresh-llm 时重新分析
+            dup_key, score = None, 0.0
+            if not (args.force or args.refresh_llm):
+                dup_key, score = find_near_duplicate(key, combined_content)
+            if dup_key:
+                print(f"\nREADME与 {dup_key} 近似重复（相似度 {score:.2f}）")
+                if os.getenv('DEDUP_ACTION', 'reuse').lower() == 'skip':
+                    print(f"跳过近似重复的文章：{key}")
+                    return
+                dup_record = state.get(dup_key)
+                if dup_record.get('analysis'):
+                    print(f"复用 {dup_key} 的分析结果")
+                    # 项目地址指向当前仓库
+                    analysis_result = dup_record['analysis'].replace(dup_key.rstrip('/'), key.rstrip('/'))
+                    record = state.reset(
+                        key, readme_hash=readme_hash, analysis=analysis_result,
+                        duplicate_of=dup_key, poster_url=dup_record.get('poster_url'),
+                        thumb_media_id=dup_record.get('thumb_media_id')
+                    )
+        
+            if analysis_result is None:
+                # 使用OpenAI分析内容
+                on_section = None
+                if args.stream or os.getenv('LLM_STREAM', 'false').lower() == 'true':
+                    def on_section(heading, body, stream):
+                        """每完成一个章节就立即渲染；第一个章节完成时标题和摘要已确定，提前开始生成封面图"""
+                        if heading in SECTION_KEYS:
+                            rendered_sections[(heading, body)] = process_section_content(body)
+                        if should_publish and 'future' not in early_poster:
+                            early_poster['content'] = extract_article_content(stream.text)
+                            early_poster['executor'] = ThreadPoolExecutor(max_workers=1)
+                            early_poster['future'] = early_poster['executor'].submit(generate_poster, early_poster['content'])
+                analysis_result = analyze_with_openai(combined_content, refresh=args.refresh_llm, on_section=on_section)
+                record = state.reset(key, readme_hash=readme_hash, analysis=analysis_result)
+                add_to_dedup_index(key, combined_content)
+    
+        # 提取文章内容
+        article_content = extract_article_content(analysis_result)
+    
+        # 生成HTML
+        html_content = generate_html(analysis_result, rendered_sections)
+    
+        # 保存HTML文件
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        state.update(key, output_file=output_file, article_content=article_content)
+        
+        print(f"\n分析完成！结果已保存到 {output_file}")
+        print("\n文章信息：")
+        print(f"标题：{article_content['title']}")
+        print(f"副标题：{article_content['sub_title']}")
+        print(f"正文预览：{article_content['body_text'][:100]}...")
+        print(llm_ledger.get_ledger().summary(key))
+    
+        # 近似重复的文章已经发布过时默认不再重复发布（DEDUP_REPUBLISH=true 时仍发布）
+        dup_key = record.get('duplicate_of')
+        if should_publish and dup_key and state.get(dup_key).get('published') \
+                and os.getenv('DEDUP_REPUBLISH', 'false').lower() != 'true':
+            print(f"\n近似重复的文章 {dup_key} 已发布，不再重复发布：{key}")
+            return
+        
+        if not should_publish:
+            print("\n已禁用发布到微信功能")
+            return
+    
+        print("\n准备发布到微信...")
+        # 生成封面图（README未变化时复用）
+        poster_url = record.get('poster_url')
+        if poster_url:
+            print(f"\n复用上次生成的封面图：{poster_url}")
+        else:
+            if 'future' in early_poster:
+                # 流式分析期间已提前开始生成，标题等信息与最终结果一致时直接使用
+                poster_url = early_poster['future'].result()
+                if early_poster['content'] != article_content:
+                    print("\n文章信息与提前生成封面图时不一致，重新生成")
+                    poster_url = None
+            if not poster_url:
+                poster_url = generate_poster(article_content)
+            if poster_url:
+                state.update(key, poster_url=poster_url)
+        if not poster_url:
+            print("\n生成封面图失败")
+            return
+        print(f"\n成功生成封面图：{poster_url}")
+    
+        print("\n=====================")
+        print("开始调用微信发布模块...")
+    
+        # 直接调用publish_to_weixin模块
+        try:
+            # 如果有海报，先上传海报（已上传过的直接复用media_id）
+            thumb_media_id = record.get('thumb_media_id')
+            if not thumb_media_id:
+                try:
+                    # 创建WeixinPublisher实例
+                    weixin_publisher = WeixinPublisher()
+                    print("正在上传海报到微信...")
+                    thumb_media_id = weixin_publisher.upload_image(poster_url)
+                    print(f"海报上传成功，media_id: {thumb_media_id}")
+                    state.update(key, thumb_media_id=thumb_media_id)
+                except Exception as e:
+                    print(f"上传海报失败: {str(e)}")
+                    if args.debug:
+                        traceback.print_exc()
+        
+            print(f"准备上传微信: {poster_url}")
+            # 准备参数
+            publish_args = {
+                'html': output_file,
+                'title': article_content['title'],
+                'author': os.getenv('AUTHOR_NAME', 'AI助手'),
+                'test': args.test,
+                'debug': args.debug
+            }
+        
+            # 如果有封面图的media_id，添加到参数中
+            if thumb_media_id:
+                publish_args['thumb_media_id'] = thumb_media_id
+        
+            print(f"调用微信发布模块，参数: {publish_args}")
+        
+            # 调用publish_to_weixin模块中的publish函数
+            result = publish_to_weixin.publish(**publish_args)
+        
+            if result:
+                print("创建草稿成功！")
+                state.update(key, published=True, published_test=args.test)
+            else:
+                print("创建草稿失败！")
+            
+        except Exception as e:
+            print(f"调用微信发布模块失败: {str(e)}")
+            if args.debug:
+                traceback.print_exc()
+    finally:
+        # 分析或发布中途出错时也要关闭提前生成封面图的线程池
+        if 'executor' in early_poster:
+            early_poster['future'].cancel()
+            early_poster['executor'].shutdown(wait=False)
+
 def main():
     try:
         # 命令行参数解析
         parser = argparse.ArgumentParser(description='GitHub项目README分析和发布工具')
-        parser.add_argument('--url', type=str, help='要分析的GitHub项目URL，覆盖环境变量中的配置')
+        parser.add_argument('--url', type=str, help='要分析的GitHub项目URL或本地仓库路径，覆盖环境变量中的配置')
         parser.add_argument('--debug', action='store_true', help='显示调试信息')
         parser.add_argument('--publish', action='store_true', help='强制发布到微信，覆盖环境变量配置')
         parser.add_argument('--test', action='store_true', help='微信发布测试模式')
         parser.add_argument('--no-publish', action='store_true', help='禁用发布到微信，覆盖环境变量配置')
+        parser.add_argument('--fetch-mode', choices=['api', 'archive'], help='README获取方式，覆盖环境变量 README_FETCH_MODE')
+        parser.add_argument('--batch', action='store_true', help='每个仓库单独生成一篇文章（默认合并为一篇），也可通过 BATCH_MODE=true 开启')
+        parser.add_argument('--force', action='store_true', help='忽略增量状态，README未变化也重新生成')
+        parser.add_argument('--refresh-llm', action='store_true', help='忽略大模型响应缓存，重新调用OpenAI分析')
+        parser.add_argument('--stream', action='store_true', help='流式接收分析结果，边生成边渲染章节，也可通过 LLM_STREAM=true 开启')
         args = parser.parse_args()
         
         try:
@@ -676,43 +1427,34 @@ def main():
             if not project_urls:
                 raise ValueError("未配置项目地址。请在.env文件中设置PROJECT_URLS或使用--url参数")
             
+            # 多个GitHub仓库时先通过GraphQL批量获取README，未命中的再逐个获取
+            fetch_mode = args.fetch_mode or os.getenv('README_FETCH_MODE', 'api').lower()
+            prefetched = {}
+            batch_urls = [
+                url for url in project_urls
+                if 'github.com' in url and '/blob/' not in url and not local_source.find_mirror(url)
+            ]
+            if fetch_mode == 'api' and len(batch_urls) > 1:
+                prefetched = github_api.fetch_readmes_batch(batch_urls)
+            
             # 获取所有README内容
-            all_content = []
+            fetched = []
             all_images = []
+            fetched_images = []
             for url in project_urls:
                 try:
-                    content, img_links = fetch_readme_content(url)
-                    all_content.append(content)
+                    content, img_links = fetch_readme_content(url, mode=fetch_mode, prefetched=prefetched.get(url))
+                    fetched.append((url, content))
+                    fetched_images.append({path for _, path in img_links})
                     all_images.extend(img_links)
                     print(f"成功获取 {url} 的README内容")
                 except Exception as e:
                     print(f"获取 {url} 的README内容失败: {str(e)}")
             
-            if not all_content:
-                raise ValueError("未能获取任何README内容")
-            
-            # 合并所有内容
-            combined_content = "\n\n---\n\n".join(all_content)
-            
-            # 使用OpenAI分析内容
-            analysis_result = analyze_with_openai(combined_content)
-            
-            # 提取文章内容
-            article_content = extract_article_content(analysis_result)
+            print(f"图片过滤：{image_filter.get_image_filter().summary()}")
             
-            # 生成HTML
-            html_content = generate_html(analysis_result)
-            
-            # 保存HTML文件
-            output_file = 'output.html'
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-                
-            print(f"\n分析完成！结果已保存到 {output_file}")
-            print("\n文章信息：")
-            print(f"标题：{article_content['title']}")
-            print(f"副标题：{article_content['sub_title']}")
-            print(f"正文预览：{article_content['body_text'][:100]}...")
+            if not fetched:
+                raise ValueError("未能获取任何README内容")
             
             # 判断是否需要发布到微信
             should_publish = False
@@ -726,65 +1468,60 @@ def main():
                 # 使用环境变量配置
                 should_publish = os.getenv('PUBLISH_TO_WEIXIN', 'false').lower() == 'true'
             
-            if should_publish:
-                print("\n准备发布到微信...")
-                # 生成封面图
-                poster_url = generate_poster(article_content)
-                if poster_url:
-                    print(f"\n成功生成封面图：{poster_url}")
-                    
-                    print("\n=====================")
-                    print("开始调用微信发布模块...")
-                    
-                    # 直接调用publish_to_weixin模块
+            # 下载的图片在图片存储中被固定，避免发布前被淘汰；
+            # 文章处理完后解除固定（仍被其他待处理文章引用的图片除外）
+            image_refs = collections.Counter(path for paths in fetched_images for path in paths)
+            image_refs_lock = threading.Lock()
+            
+            def release_images(paths):
+                with image_refs_lock:
+                    image_refs.subtract(paths)
+                    released = [path for path in paths if image_refs[path] <= 0]
+                try:
+                    image_store.get_image_store().unpin(released)
+                except Exception as e:
+                    print(f"解除图片固定失败: {str(e)}")
+            
+            batch = args.batch or os.getenv('BATCH_MODE', 'false').lower() == 'true'
+            if batch:
+                # 每个仓库一篇文章，只有README变化的仓库才会重新生成
+                # BATCH_WORKERS 大于1时并发处理，大模型请求由调度器统一限速
+                def process_repo(url, content, images):
                     try:
-                        # 创建WeixinPublisher实例
-                        weixin_publisher = WeixinPublisher()
-                        
-                        # 如果有海报，先上传海报
-                        thumb_media_id = None
-                        if poster_url:
-                            try:
-                                print("正在上传海报到微信...")
-                                thumb_media_id = weixin_publisher.upload_image(poster_url)
-                                print(f"海报上传成功，media_id: {thumb_media_id}")
-                            except Exception as e:
-                                print(f"上传海报失败: {str(e)}")
-                                if args.debug:
-                                    traceback.print_exc()
-                        
-                        print(f"准备上传微信: {poster_url}")
-                        # 准备参数
-                        publish_args = {
-                            'html': output_file,
-                            'title': article_content['title'],
-                            'author': os.getenv('AUTHOR_NAME', 'AI助手'),
-                            'test': args.test,
-                            'debug': args.debug
-                        }
-                        
-                        # 如果有封面图的media_id，添加到参数中
-                        if thumb_media_id:
-                            publish_args['thumb_media_id'] = thumb_media_id
-                        
-                        print(f"调用微信发布模块，参数: {publish_args}")
-                        
-                        # 调用publish_to_weixin模块中的publish函数
-                        result = publish_to_weixin.publish(**publish_args)
-                        
-                        if result:
-                            print("创建草稿成功！")
-                        else:
-                            print("创建草稿失败！")
-                            
+                        process_article(
+                            url, [content], args, should_publish,
+                            get_article_output_file(url, batch=True)
+                        )
                     except Exception as e:
-                        print(f"调用微信发布模块失败: {str(e)}")
+                        print(f"处理 {url} 失败: {str(e)}")
                         if args.debug:
                             traceback.print_exc()
+                    finally:
+                        release_images(images)
+                
+                batch_workers = int(os.getenv('BATCH_WORKERS', '1'))
+                if batch_workers > 1:
+                    with ThreadPoolExecutor(max_workers=batch_workers) as executor:
+                        for future in [
+                            executor.submit(process_repo, url, content, images)
+                            for (url, content), images in zip(fetched, fetched_images)
+                        ]:
+                            future.result()
                 else:
-                    print("\n生成封面图失败")
+                    for (url, content), images in zip(fetched, fetched_images):
+                        process_repo(url, content, images)
             else:
-                print("\n已禁用发布到微信功能")
+                key = ','.join(url for url, _ in fetched)
+                try:
+                    process_article(
+                        key, [content for _, content in fetched], args, should_publish,
+                        get_article_output_file(key, batch=False)
+                    )
+                finally:
+                    release_images(set().union(*fetched_images))
+            
+            print(f"\n{llm_scheduler.get_llm_scheduler().summary()}")
+            print(llm_ledger.get_ledger().summary())
             
         except Exception as e:
             print(f"发生错误: {str(e)}")
@@ -800,4 +1537,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    sys.exit(main()) 
\ No newline at end of file
+    sys.exit(main()) 
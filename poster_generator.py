@@ -4,7 +4,7 @@
 import os
 import json
 import time
-import requests
+import http_client
 from dotenv import load_dotenv
 
 class PosterGenerator:
@@ -81,7 +81,7 @@ class PosterGenerator:
         print(f"Data: {json.dumps(data, indent=2, ensure_ascii=False)}")
 
         # 发送请求
-        response = requests.post(self.url, headers=self.headers, json=data)
+        response = http_client.post(self.url, headers=self.headers, json=data)
         print(f"\n响应状态码: {response.status_code}")
         
         if response.status_code != 200:
@@ -104,7 +104,7 @@ class PosterGenerator:
             time.sleep(20)  # 每20秒检查一次状态
             print(f"\n检查任务状态: {task_id}")
             
-            status_response = requests.get(status_url, headers=self.headers)
+            status_response = http_client.get(status_url, headers=self.headers)
             if status_response.status_code != 200:
                 print(f"检查状态失败: {status_response.text}")
                 raise Exception(f"检查状态失败: {status_response.status_code}")
@@ -5,6 +5,7 @@ import os
 import sys
 import argparse
 from weixin_publisher import WeixinPublisher
+import text_normalizer
 from dotenv import load_dotenv
 import traceback
 import json
@@ -35,39 +36,20 @@ def publish(html='output.html', title=None, author=None, test=False, debug=False
             print(f"错误: HTML文件不存在 - {html_file}")
             return False
             
-        # 读取HTML文件，确保使用UTF-8编码
-        try:
-            with open(html_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-                
-            # 检查内容是否为空
-            if not html_content.strip():
-                print(f"错误: HTML文件内容为空 - {html_file}")
-                return False
-                
-            # 打印前100个字符用于调试
-            if debug:
-                print("\nHTML内容预览（前100个字符）:")
-                print(html_content[:100])
-                print("...")
-                
-        except UnicodeDecodeError:
-            print(f"错误: HTML文件编码不是UTF-8，尝试使用其他编码...")
-            # 尝试使用其他编码
-            encodings = ['gbk', 'gb2312', 'gb18030', 'latin1']
-            for encoding in encodings:
-                try:
-                    with open(html_file, 'r', encoding=encoding) as f:
-                        html_content = f.read()
-                    print(f"成功使用 {encoding} 编码读取文件")
-                    # 转换为UTF-8
-                    html_content = html_content.encode(encoding).decode('utf-8')
-                    break
-                except:
-                    continue
-            else:
-                print("错误: 无法正确读取HTML文件，请确保文件编码正确")
-                return False
+        # 读取HTML文件：优先按UTF-8解码，失败时尝试GB18030等编码，并统一换行和Unicode形式
+        with open(html_file, 'rb') as f:
+            html_content = text_normalizer.normalize_text(f.read(), decode_escapes=False, markdown=False)
+            
+        # 检查内容是否为空
+        if not html_content.strip():
+            print(f"错误: HTML文件内容为空 - {html_file}")
+            return False
+            
+        # 打印前100个字符用于调试
+        if debug:
+            print("\nHTML内容预览（前100个字符）:")
+            print(html_content[:100])
+            print("...")
             
         # 尝试从HTML中提取标题（如果未提供）
         if not title:
@@ -83,6 +65,8 @@ def publish(html='output.html', title=None, author=None, test=False, debug=False
                 else:
                     title = "项目分析报告"
                 
+        title = text_normalizer.normalize_text(title, markdown=False)
+        
         # 获取作者
         author = author or os.getenv('AUTHOR_NAME', 'AI助手')
         
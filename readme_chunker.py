@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""长README分块
+
+按标题边界把README切分为不超过指定长度的块，供分块摘要（map）后再统一成文（reduce）使用，
+避免超过长度上限的内容被直接截断丢弃。
+
+- 代码块内的 `#` 行不视为标题
+- 相邻的小节合并到同一块，单个小节过长时再按段落、最后按字符切分
+"""
+
+import re
+
+_HEADING = re.compile(r'^#{1,6}\s')
+_FENCE = re.compile(r'^\s*(```|~~~)')
+
+
+def split_sections(content):
+    """按标题切分为小节（每个小节以标题行开头，第一个小节可能没有标题）"""
+    sections = []
+    current = []
+    in_code_block = False
+    for line in content.split('\n'):
+        if _FENCE.match(line):
+            in_code_block = not in_code_block
+        elif not in_code_block and _HEADING.match(line) and current:
+            sections.append('\n'.join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append('\n'.join(current))
+    return [section for section in sections if section.strip()]
+
+
+def _split_oversized(section, chunk_size):
+    """把超长小节按段落切分，单个段落仍超长时按字符切分"""
+    pieces = []
+    current = ''
+    for paragraph in section.split('\n\n'):
+        while len(paragraph) > chunk_size:
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(paragraph[:chunk_size])
+            paragraph = paragraph[chunk_size:]
+        if current and len(current) + len(paragraph) + 2 > chunk_size:
+            pieces.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(content, chunk_size):
+    """把README切分为不超过 chunk_size 个字符的块
+
+    Args:
+        content (str): README内容
+        chunk_size (int): 每块的最大字符数
+
+    Returns:
+        list: 块列表，保持原文顺序
+    """
+    chunks = []
+    current = ''
+    for section in split_sections(content):
+        if len(section) > chunk_size:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.extend(_split_oversized(section, chunk_size))
+        elif current and len(current) + len(section) + 1 > chunk_size:
+            chunks.append(current)
+            current = section
+        else:
+            current = f"{current}\n{section}" if current else section
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""README压缩
+
+在交给大模型之前，用确定性的规则去掉对写文章没有帮助的内容，减少输入token：
+- 徽章、访问统计图片（整行都是徽章时删除整行）
+- HTML注释；常见HTML元素的标签只保留文字，<img> 转为Markdown图片（行内代码和类型参数如 Vec<String> 不受影响）
+- 目录（Table of Contents）
+- 许可证正文（只保留第一行）、贡献者 / 赞助者 / Star History 等列表
+- 重复的链接引用定义
+- 过长的代码块只保留开头若干行
+
+代码块内的内容除截断外不做任何改动。
+
+相关环境变量：
+    README_COMPACT_ENABLED      是否启用，默认 true
+    README_COMPACT_CODE_LINES   代码块保留的最大行数，默认 30
+"""
+
+import os
+import re
+import image_filter
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken 可选，仅用于精确计算token数
+    tiktoken = None
+
+_encoding = None
+
+_FENCE = re.compile(r'^\s*(```|~~~)')
+_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_HTML_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_HTML_IMG = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_HTML_ATTR = re.compile(r'''\b(src|alt)\s*=\s*["']([^"']*)["']''', re.IGNORECASE)
+# 只去掉常见的HTML元素（区分大小写），避免误删 Vec<String>、Option<T>、Box<B> 之类的类型参数
+HTML_ELEMENTS = (
+    'a', 'abbr', 'b', 'big', 'blockquote', 'br', 'center', 'code', 'dd', 'del', 'details', 'div', 'dl', 'dt',
+    'em', 'figcaption', 'figure', 'font', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'ins', 'kbd',
+    'li', 'ol', 'p', 'picture', 'pre', 's', 'samp', 'small', 'source', 'span', 'strike', 'strong', 'sub',
+    'summary', 'sup', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'tt', 'u', 'ul', 'video'
+)
+_HTML_TAG = re.compile(
+    r'</?(?:' + '|'.join(HTML_ELEMENTS) + r')(?=[\s/>])(?:\s+[a-zA-Z_:][-\w:.]*(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s"\'>]+))?)*\s*/?>'
+)
+_CODE_SPAN = re.compile(r'(`+)(?:.+?)\1')
+_LINKED_IMAGE = re.compile(r'\[!\[[^\]]*\]\(([^)\s]+)[^)]*\)\]\([^)]*\)')
+_IMAGE = re.compile(r'!\[[^\]]*\]\(([^)\s]+)[^)]*\)')
+_REFERENCE = re.compile(r'^\s{0,3}\[([^\]]+)\]:\s*(\S+)')
+_ANCHOR_ITEM = re.compile(r'^\s*([-*+]|\d+\.)\s+\[[^\]]+\]\(#[^)]*\)\s*$')
+
+# 目录标题
+TOC_HEADINGS = ('table of contents', 'contents', 'toc', '目录', '目 录')
+# 只保留第一行的章节
+LICENSE_HEADINGS = ('license', 'licence', 'licensing', '许可', '许可证', '开源协议', '协议', 'license 许可证')
+# 整节删除的章节
+DROP_HEADINGS = (
+    'contributors', 'contributing', 'contribution', 'backers', 'sponsors', 'sponsor',
+    'star history', 'stargazers', 'stargazers over time', 'thanks to all contributors',
+    '贡献者', '贡献', '赞助', '赞助者', '致谢贡献者', 'star 历史', 'star历史'
+)
+
+
+def estimate_tokens(text):
+    """估算token数（有 tiktoken 时精确计算，否则中日韩字符按1个、其他按4个字符1个估算）"""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        return len(_encoding.encode(text))
+    cjk = len(re.findall(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]', text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _heading_kind(title):
+    """判断标题对应的处理方式"""
+    name = re.sub(r'[^\w\s]', '', title).strip().lower()
+    if name in TOC_HEADINGS:
+        return 'toc'
+    if name in LICENSE_HEADINGS:
+        return 'license'
+    if name in DROP_HEADINGS:
+        return 'drop'
+    return None
+
+
+def _is_noise_image(url):
+    """是否为徽章或访问统计图片"""
+    return image_filter.get_image_filter().classify(url) in ('badge', 'tracking')
+
+
+def _html_img_to_markdown(match):
+    """把 <img> 标签转为Markdown图片"""
+    attrs = {name.lower(): value for name, value in _HTML_ATTR.findall(match.group(0))}
+    if not attrs.get('src'):
+        return ''
+    return f"![{attrs.get('alt', '')}]({attrs['src']})"
+
+
+def _outside_code_spans(line, func):
+    """只对行内代码之外的文字应用 func，行内代码保持原样"""
+    parts = []
+    position = 0
+    for match in _CODE_SPAN.finditer(line):
+        parts.append(func(line[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(func(line[position:]))
+    return ''.join(parts)
+
+
+def _strip_html(text):
+    """去掉HTML标签，<img> 转为Markdown图片"""
+    return _HTML_TAG.sub('', _HTML_IMG.sub(_html_img_to_markdown, text))
+
+
+def _compact_line(line):
+    """压缩代码块外的一行，整行都是无用内容时返回 None"""
+    original = line.strip()
+    line = _outside_code_spans(line, _strip_html)
+    line = _LINKED_IMAGE.sub(lambda m: '' if _is_noise_image(m.group(1)) else m.group(0), line)
+    line = _IMAGE.sub(lambda m: '' if _is_noise_image(m.group(1)) else m.group(0), line)
+    if original and not line.strip():
+        return None
+    return line.rstrip()
+
+
+def _collapse_code(lines, max_lines):
+    """截断过长的代码块（lines 含首尾围栏行）"""
+    body = lines[1:-1] if len(lines) > 1 and _FENCE.match(lines[-1]) else lines[1:]
+    if len(body) <= max_lines:
+        return lines
+    omitted = len(body) - max_lines
+    tail = [lines[-1]] if len(lines) > 1 and _FENCE.match(lines[-1]) else []
+    return [lines[0]] + body[:max_lines] + [f"... (省略 {omitted} 行)"] + tail
+
+
+def compact_readme(content, max_code_lines=None):
+    """压缩README内容
+
+    Args:
+        content (str): README内容
+        max_code_lines (int): 代码块保留的最大行数，默认读取 README_COMPACT_CODE_LINES
+
+    Returns:
+        str: 压缩后的内容
+    """
+    if max_code_lines is None:
+        max_code_lines = int(os.getenv('README_COMPACT_CODE_LINES', '30'))
+
+    # HTML注释可能跨行，先整体去掉（代码块中极少出现，不单独区分）
+    content = _HTML_COMMENT.sub('', content)
+
+    output = []
+    code_block = None
+    skip_level = None  # 正在删除的章节标题级别
+    license_level = None  # 正在处理的许可证章节标题级别
+    license_kept = False
+    seen_references = set()
+
+    for line in content.split('\n'):
+        if code_block is not None:
+            code_block.append(line)
+            if _FENCE.match(line):
+                if skip_level is None and license_level is None:
+                    output.extend(_collapse_code(code_block, max_code_lines))
+                code_block = None
+            continue
+        if _FENCE.match(line):
+            code_block = [line]
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            if skip_level is not None and level > skip_level:
+                continue
+            if license_level is not None and level > license_level:
+                continue
+            skip_level = license_level = None
+            kind = _heading_kind(_outside_code_spans(heading.group(2), _strip_html))
+            if kind in ('toc', 'drop'):
+                skip_level = level
+                continue
+            if kind == 'license':
+                license_level = level
+                license_kept = False
+            output.append(_outside_code_spans(line, _strip_html).rstrip())
+            continue
+
+        if skip_level is not None:
+            continue
+        if license_level is not None:
+            if license_kept or not line.strip():
+                continue
+            license_kept = True
+
+        reference = _REFERENCE.match(line)
+        if reference:
+            ref = (reference.group(1).lower(), reference.group(2))
+            if ref in seen_references:
+                continue
+            seen_references.add(ref)
+
+        # 未加标题的目录：只包含页内锚点链接的列表项
+        if _ANCHOR_ITEM.match(line):
+            continue
+
+        compacted = _compact_line(line)
+        if compacted is not None:
+            output.append(compacted)
+
+    if code_block is not None and skip_level is None and license_level is None:
+        output.extend(_collapse_code(code_block, max_code_lines))
+
+    text = '\n'.join(output)
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def is_enabled():
+    """是否启用压缩"""
+    return os.getenv('README_COMPACT_ENABLED', 'true').lower() == 'true'
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""流式输出的章节切分
+
+大模型以流式方式返回文章时，逐段接收文本并在遇到 `## ` 标题时切出上一个完整章节，
+交给回调立即处理（渲染HTML、提取封面信息等），不必等待整篇文章生成完毕。
+切分规则与 generate_html 保持一致：`# ` 行为主标题，`## ` 行开始新章节，空章节不回调。
+"""
+
+
+class SectionStream:
+    """增量章节解析器"""
+
+    def __init__(self, on_section=None):
+        """初始化解析器
+
+        Args:
+            on_section (callable): 章节完成时的回调，参数为 (章节标题, 章节内容, 解析器)
+        """
+        self.on_section = on_section
+        self.title = ''
+        self.sections = []
+        self._chunks = []
+        self._pending = ''
+        self._current = None
+        self._lines = []
+
+    @property
+    def text(self):
+        """目前收到的全部文本"""
+        return ''.join(self._chunks)
+
+    def feed(self, text):
+        """接收一段文本，处理其中所有完整的行"""
+        if not text:
+            return
+        self._chunks.append(text)
+        if '\n' not in text:
+            self._pending += text
+            return
+        lines = (self._pending + text).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._handle_line(line)
+
+    def close(self):
+        """处理剩余文本和最后一个章节
+
+        Returns:
+            str: 完整文本
+        """
+        if self._pending:
+            self._handle_line(self._pending)
+            self._pending = ''
+        self._emit()
+        self._current = None
+        self._lines = []
+        return self.text
+
+    def _handle_line(self, line):
+        """处理一行"""
+        if line.startswith('# '):
+            self.title = line.replace('# ', '').strip()
+        elif line.startswith('## '):
+            self._emit()
+            self._current = line.replace('## ', '').strip()
+            self._lines = []
+        elif self._current:
+            self._lines.append(line)
+
+    def _emit(self):
+        """输出当前章节"""
+        if not (self._current and self._lines):
+            return
+        section = (self._current, '\n'.join(self._lines))
+        self.sections.append(section)
+        if self.on_section:
+            self.on_section(section[0], section[1], self)
+
+
+def replay(text, on_section):
+    """把已有的完整文本按流式方式切分回调（用于缓存命中等场景）"""
+    stream = SectionStream(on_section)
+    stream.feed(text)
+    return stream.close()
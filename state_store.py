@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""增量运行状态存储
+
+记录每篇文章（单个仓库或一组仓库）对应的README内容哈希以及生成的产物
+（分析结果、HTML文件、海报URL、封面 media_id、发布状态）。
+README没有变化时，main() 直接复用这些产物，跳过大模型、海报生成和上传。
+
+相关环境变量：
+    STATE_FILE   状态文件路径，默认 CACHE_DIR/state.json
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+_state_store = None
+_state_store_lock = threading.Lock()
+
+
+def content_hash(content):
+    """计算README内容哈希（忽略行尾空白和换行符差异）"""
+    normalized = '\n'.join(line.rstrip() for line in content.replace('\r\n', '\n').split('\n')).strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class StateStore:
+    """增量运行状态存储"""
+
+    def __init__(self, state_file=None):
+        """初始化状态存储
+
+        Args:
+            state_file (str): 状态文件路径，默认读取 STATE_FILE
+        """
+        self.state_file = state_file or os.getenv('STATE_FILE') or os.path.join(os.getenv('CACHE_DIR', '.cache'), 'state.json')
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self):
+        """读取状态文件"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        """写回状态文件"""
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        tmp_file = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def get(self, key):
+        """读取记录副本，不存在时返回空字典"""
+        with self._lock:
+            return dict(self._data.get(key) or {})
+
+    def update(self, key, **fields):
+        """更新记录中的字段并立即写盘"""
+        with self._lock:
+            record = self._data.setdefault(key, {})
+            record.update(fields)
+            record['updated_at'] = time.time()
+            try:
+                self._save()
+            except OSError as e:
+                print(f"写入运行状态失败: {str(e)}")
+            return dict(record)
+
+    def reset(self, key, **fields):
+        """用新字段替换整条记录（README变化时丢弃旧产物）"""
+        with self._lock:
+            self._data[key] = {}
+        return self.update(key, **fields)
+
+
+def get_state_store():
+    """获取全局状态存储"""
+    global _state_store
+    with _state_store_lock:
+        if _state_store is None:
+            _state_store = StateStore()
+        return _state_store
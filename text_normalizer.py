@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""文本规范化
+
+统一处理大模型输出、文章内容和待发布HTML中的编码问题：
+- 字节串按 UTF-8（失败时依次尝试 GB18030、Latin-1）解码
+- 把残留的 \\uXXXX 转义序列还原为字符（代码块和行内代码中的保持原样）
+- 统一换行符，去掉行尾空白、BOM和零宽字符
+- Unicode NFC 规范化
+
+所有处理在一次正则扫描中完成，耗时与文本长度成线性关系；
+不含上述问题的文本直接原样返回。
+"""
+
+import re
+import unicodedata
+
+FALLBACK_ENCODINGS = ('utf-8', 'gb18030', 'latin-1')
+
+# 需要处理的片段：代码块、行内代码、转义序列、回车、行尾空白、BOM/零宽字符
+_CODE_PATTERNS = (
+    r'(?P<fence>^[ \t]*(?P<marker>```|~~~)[^\n]*\n.*?(?:^[ \t]*(?P=marker)[ \t]*$|\Z))'
+    r'|(?P<code>`[^`\n]+`)|'
+)
+_TEXT_PATTERNS = (
+    r'(?P<escape>\\u[0-9a-fA-F]{4}(?:\\u[0-9a-fA-F]{4})?|\\U[0-9a-fA-F]{8})'
+    r'|(?P<cr>\r\n?)'
+    r'|(?P<trailing>[ \t]+(?=\r?\n|\Z))'
+    r'|(?P<invisible>[\ufeff\u200b\u200c\u200d\u2060])'
+)
+_MARKDOWN_TOKEN = re.compile(_CODE_PATTERNS + _TEXT_PATTERNS, re.MULTILINE | re.DOTALL)
+_TEXT_TOKEN = re.compile(_TEXT_PATTERNS)
+
+# 快速判断：没有这些字符的文本只需检查 NFC
+_NEEDS_WORK = re.compile(r'\\[uU]|\r|[ \t](?:\n|\Z)|[\ufeff\u200b\u200c\u200d\u2060]')
+_CODE_CR = re.compile(r'\r\n?')
+
+
+def decode_bytes(data):
+    """把字节串解码为字符串"""
+    if isinstance(data, str):
+        return data
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode('utf-8', errors='replace')
+
+
+def _decode_escape(escape):
+    """还原一个转义序列（含UTF-16代理对），无法还原时保持原样"""
+    if escape[1] == 'U':
+        code = int(escape[2:], 16)
+        return chr(code) if code <= 0x10FFFF else escape
+    high = int(escape[2:6], 16)
+    if len(escape) == 12:
+        low = int(escape[8:12], 16)
+        if 0xD800 <= high <= 0xDBFF and 0xDC00 <= low <= 0xDFFF:
+            return chr(0x10000 + ((high - 0xD800) << 10) + (low - 0xDC00))
+        return _decode_escape(escape[:6]) + _decode_escape(escape[6:])
+    if 0xD800 <= high <= 0xDFFF:
+        # 落单的代理项无法编码为UTF-8
+        return escape
+    return chr(high)
+
+
+def normalize_text(text, decode_escapes=True, markdown=True):
+    """规范化文本
+
+    Args:
+        text (str|bytes): 输入文本
+        decode_escapes (bool): 是否还原 \\uXXXX 转义序列
+        markdown (bool): 是否按Markdown识别代码块和行内代码（其中的转义序列和行尾空白保持原样）
+
+    Returns:
+        str: 规范化后的文本
+    """
+    if text is None:
+        return ''
+    text = decode_bytes(text)
+
+    if _NEEDS_WORK.search(text):
+        def replace(match):
+            kind = match.lastgroup
+            value = match.group(0)
+            if kind in ('fence', 'code'):
+                return _CODE_CR.sub('\n', value)
+            if kind == 'escape':
+                return _decode_escape(value) if decode_escapes else value
+            if kind == 'cr':
+                return '\n'
+            return ''
+
+        text = (_MARKDOWN_TOKEN if markdown else _TEXT_TOKEN).sub(replace, text)
+
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    return text
@@ -3,6 +3,10 @@
 
 import os
 import requests
+import http_client
+import image_store
+import image_filter
+import image_probe
 import json
 import time
 import re
@@ -51,7 +55,7 @@ class WeixinPublisher:
             "secret": self.app_secret
         }
         
-        response = requests.get(url, params=params)
+        response = http_client.get(url, params=params)
         if response.status_code != 200:
             raise Exception(f"获取微信访问令牌失败: {response.text}")
         
@@ -89,7 +93,7 @@ class WeixinPublisher:
             
         # 获取图片内容
         try:
-            response = requests.get(image_url)
+            response = http_client.get(image_url)
             image_content = response.content
         except Exception as e:
             print(f"获取图片内容失败: {str(e)}")
@@ -110,7 +114,7 @@ class WeixinPublisher:
             }
             
             # 发送请求
-            response = requests.post(url, files=files)
+            response = http_client.post(url, files=files)
             result = response.json()
             
             if 'media_id' in result:
@@ -379,10 +383,14 @@ class WeixinPublisher:
         
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
+        
+        # 超过微信上限的图片直接拒绝，省去一次必然失败的API调用
+        if type == 'image' and os.path.getsize(file_path) > image_probe.get_max_bytes():
+            raise Exception(f"图片超过上传大小限制: {file_path}")
             
         with open(file_path, 'rb') as f:
             files = {'media': f}
-            response = requests.post(url, files=files)
+            response = http_client.post(url, files=files)
             
         if response.status_code != 200:
             raise Exception(f"上传临时素材失败: {response.text}")
@@ -456,7 +464,7 @@ class WeixinPublisher:
             }
             # 使用ensure_ascii=False确保中文字符正确编码
             request_data = json.dumps(article_data, ensure_ascii=False).encode('utf-8')
-            response = requests.post(url, data=request_data, headers=headers)
+            response = http_client.post(url, data=request_data, headers=headers)
             
             print(f"收到API响应: HTTP {response.status_code}")
             
@@ -501,7 +509,7 @@ class WeixinPublisher:
             "media_id": media_id
         }
         
-        response = requests.post(url, json=data)
+        response = http_client.post(url, json=data)
         if response.status_code != 200:
             raise Exception(f"发布草稿失败: {response.text}")
         
@@ -520,7 +528,7 @@ class WeixinPublisher:
             "publish_id": publish_id
         }
         
-        response = requests.post(url, json=data)
+        response = http_client.post(url, json=data)
         if response.status_code != 200:
             raise Exception(f"获取发布状态失败: {response.text}")
         
@@ -570,15 +578,25 @@ class WeixinPublisher:
                 tag.decompose()
             
             # 处理图片标签
+            uploaded_media = {}
             for img in soup.find_all('img'):
                 # 获取图片URL和替代文本
                 src = img.get('src', '')
                 alt = img.get('alt', '')
                 
+                # 徽章、跟踪像素和SVG不上传，直接移除
+                if image_filter.get_image_filter().should_skip(src):
+                    img.decompose()
+                    continue
+                
                 # 如果是本地图片路径，需要上传到微信
                 if src.startswith(('/', 'images/')):
                     try:
-                        media_id = self.upload_temp_material(src)
+                        # 从图片存储中解析路径，相同内容的图片只上传一次
+                        local_path = image_store.get_image_store().resolve(src) or src
+                        if local_path not in uploaded_media:
+                            uploaded_media[local_path] = self.upload_temp_material(local_path)
+                        media_id = uploaded_media[local_path]
                         # 更新图片URL为微信临时素材URL
                         img['src'] = f"https://api.weixin.qq.com/cgi-bin/media/get?access_token={self.get_access_token()}&media_id={media_id}"
                     except Exception as e:
@@ -601,6 +619,7 @@ class WeixinPublisher:
             processed_html = '\n'.join(lines)
             
             print(f"HTML内容处理完成，处理后长度: {len(processed_html)} 字节")
+            print(f"图片过滤：{image_filter.get_image_filter().summary()}")
             
             # 准备文章数据
             article_data = {
@@ -638,7 +657,7 @@ class WeixinPublisher:
             headers = {
                 'Content-Type': 'application/json; charset=utf-8'
             }
-            response = requests.post(
+            response = http_client.post(
                 url,
                 data=json.dumps(article_data, ensure_ascii=False).encode('utf-8'),
                 headers=headers